@@ -0,0 +1,73 @@
+'''
+Times pysat.utils.create_datetime_index on 10^7 timestamps spread over ten
+years, with month and day, with day of year, with float seconds, and with
+integer nanoseconds. The previous month by month implementation is timed
+for comparison.
+'''
+
+from __future__ import print_function
+
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pds
+import pysat
+
+num = 10**7
+
+
+def previous_create_datetime_index(year, month, day, uts):
+    """create_datetime_index before it used datetime64 arithmetic"""
+    uts_del = uts.copy().astype(float)
+    _, idx = np.unique(year*100. + month, return_index=True)
+    idx2 = np.hstack((idx, len(year) + 1))
+    for _idx, _idx2 in zip(idx[1:], idx2[2:]):
+        temp = (datetime(year[_idx], month[_idx], 1) -
+                datetime(year[0], month[0], 1))
+        uts_del[_idx:_idx2] += temp.total_seconds()
+    uts_del += (day - 1)*86400
+    uts_del += (datetime(year[0], month[0], 1) -
+                datetime(1970, 1, 1)).total_seconds()
+    uts_del *= 1E9
+    return pds.to_datetime(uts_del)
+
+
+# sorted sample times, as in a loaded data set
+nanos = np.sort(np.random.RandomState(0).randint(
+                    pds.Timestamp('2005-01-01').value,
+                    pds.Timestamp('2015-01-01').value, size=num))
+times = pds.DatetimeIndex(nanos)
+year = np.asarray(times.year).astype(int)
+month = np.asarray(times.month).astype(int)
+day = np.asarray(times.day).astype(int)
+doy = np.asarray(times.dayofyear).astype(int)
+ut_ns = nanos - times.normalize().values.view(np.int64)
+uts = ut_ns*1E-9
+
+
+def best_time(func, repeats=3):
+    """Shortest wall time over repeats, in seconds"""
+    best = np.inf
+    for i in range(repeats):
+        tic = time.time()
+        func()
+        best = min(best, time.time() - tic)
+    return best
+
+print('{:d} timestamps'.format(num))
+print('previous, float seconds: {:.3f} s'.format(best_time(
+      lambda: previous_create_datetime_index(year, month, day, uts))))
+print('month and day, float seconds: {:.3f} s'.format(best_time(
+      lambda: pysat.utils.create_datetime_index(year=year, month=month, 
+                                                day=day, uts=uts))))
+print('day of year, float seconds: {:.3f} s'.format(best_time(
+      lambda: pysat.utils.create_datetime_index(year=year, day=doy, 
+                                                uts=uts))))
+print('month and day, integer ns: {:.3f} s'.format(best_time(
+      lambda: pysat.utils.create_datetime_index(year=year, month=month, 
+                                                day=day, ut_ns=ut_ns))))
+index = pysat.utils.create_datetime_index(year=year, month=month, day=day,
+                                          ut_ns=ut_ns)
+print('integer ns exact: {}'.format((index.values.view(np.int64) ==
+                                     nanos).all()))
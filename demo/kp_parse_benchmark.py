@@ -0,0 +1,42 @@
+'''
+Times parsing of Kp index files by sw_kp. Eighty years of synthetic daily
+lines, in the layout of the GFZ monthly .tab files, are parsed at once and
+one month at a time. Only the timing is of interest, two digit years
+beyond the century are not meaningful.
+'''
+
+from __future__ import print_function
+
+import time
+
+import numpy as np
+import pandas as pds
+
+from pysat.instruments import sw_kp
+
+num_years = 80
+
+dates = pds.date_range('1930-01-01', periods=int(num_years*365.25), freq='D')
+rng = np.random.RandomState(0)
+values = rng.randint(0, 10, size=(len(dates), 8))
+flags = np.array(['-', 'o', '+'])[rng.randint(0, 3, size=(len(dates), 8))]
+
+lines = []
+for date, vals, flgs in zip(dates, values, flags):
+    kp = [str(v) + f for v, f in zip(vals, flgs)]
+    line = ' '.join((date.strftime('%y%m%d'), '', ' '.join(kp[0:4]), '',
+                     ' '.join(kp[4:8]), '  ', '12o 5 0.20'))
+    lines.append(line.encode('ascii'))
+
+tic = time.time()
+data = sw_kp._parse_lines(lines)
+print('{:d} years, {:d} values at once: {:.3f} s'.format(num_years, len(data),
+                                                         time.time() - tic))
+
+months = dates.year*12 + dates.month
+splits = np.where(np.diff(months) != 0)[0] + 1
+tic = time.time()
+for month in np.split(np.arange(len(lines)), splits):
+    sw_kp._parse_lines([lines[i] for i in month])
+print('{:d} months, one at a time: {:.3f} s'.format(len(splits) + 1,
+                                                   time.time() - tic))
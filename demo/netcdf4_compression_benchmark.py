@@ -0,0 +1,58 @@
+'''
+Compares file size, write time, and read times for netCDF4 files written
+by Instrument.to_netcdf4 with different compression and chunking settings.
+
+A full day of pysat_testing data (86400 samples) is written once per
+setting. Reads of the whole file and of a one hour range are timed.
+'''
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import pysat
+
+# settings to compare, passed as keywords to to_netcdf4
+settings = [('contiguous', {}),
+            ('zlib 1', {'zlib': True, 'complevel': 1}),
+            ('zlib 4', {'zlib': True, 'complevel': 4}),
+            ('zlib 4, no shuffle', {'zlib': True, 'shuffle': False}),
+            ('zlib 4, 1 day chunks', {'zlib': True, 'chunksizes': 86400}),
+            ('zlib 4, lsd 3', {'zlib': True, 'least_significant_digit': 3})]
+# number of repeats used for each timing
+repeats = 5
+
+out_dir = tempfile.mkdtemp()
+inst = pysat.Instrument('pysat', 'testing', clean_level='clean')
+inst.load(2009, 1)
+start = pysat.datetime(2009, 1, 1, 12)
+stop = pysat.datetime(2009, 1, 1, 13)
+
+
+def best_time(func):
+    """Shortest wall time over repeats, in seconds"""
+    times = []
+    for i in range(repeats):
+        tic = time.time()
+        func()
+        times.append(time.time() - tic)
+    return min(times)
+
+print('{:24s} {:>10s} {:>10s} {:>10s} {:>10s}'.format('setting', 'size (MB)',
+                                                      'write (s)', 'read (s)',
+                                                      'hour (s)'))
+for label, kwargs in settings:
+    fname = os.path.join(out_dir, 'benchmark.nc')
+    write = best_time(lambda: inst.to_netcdf4(fname, **kwargs))
+    size = os.path.getsize(fname) / 1024.**2
+    read = best_time(lambda: pysat.utils.load_netcdf4(fname))
+    hour = best_time(lambda: pysat.utils.load_netcdf4(fname, start=start,
+                                                      stop=stop))
+    print('{:24s} {:10.2f} {:10.3f} {:10.3f} {:10.3f}'.format(label, size,
+                                                             write, read,
+                                                             hour))
+
+shutil.rmtree(out_dir)
@@ -0,0 +1,70 @@
+'''
+Measures the time and the DataFrame copies made per day when iterating 
+over padded pysat_testing data (86400 samples per day, pad of 5 minutes).
+
+Copies are counted by wrapping pandas.concat and DataFrame.copy for calls
+made from pysat._instrument, and are reported as the number of calls and
+the size of the frames they return. The time of the pad stage alone is 
+taken from load_stats.
+'''
+
+from __future__ import print_function
+
+import sys
+import time
+
+import numpy as np
+import pandas as pds
+import pysat
+
+num_days = 10
+
+copies = {'calls': 0, 'bytes': 0}
+
+
+def counted(func):
+    """Tally frames returned by func when called from pysat._instrument"""
+    def wrapper(*args, **kwargs):
+        out = func(*args, **kwargs)
+        caller = sys._getframe(1).f_globals.get('__name__')
+        if (caller == 'pysat._instrument') and \
+                isinstance(out, pds.DataFrame):
+            copies['calls'] += 1
+            copies['bytes'] += out.memory_usage(index=True).sum()
+        return out
+    return wrapper
+
+pds.concat = counted(pds.concat)
+pds.DataFrame.copy = counted(pds.DataFrame.copy)
+
+inst = pysat.Instrument('pysat', 'testing', clean_level='clean',
+                        pad={'minutes': 5}, profile_load=True)
+dates = pds.date_range(pysat.datetime(2009, 1, 1), periods=num_days, freq='D')
+day_bytes = None
+
+times = []
+pad_times = []
+calls = []
+copied = []
+for date in dates:
+    copies['calls'] = 0
+    copies['bytes'] = 0
+    tic = time.time()
+    inst.load(date=date)
+    times.append(time.time() - tic)
+    stats = inst.load_stats
+    pad_times.append(stats.loc[stats['stage'] == 'pad', 'time'].sum())
+    calls.append(copies['calls'])
+    copied.append(copies['bytes'])
+    day_bytes = inst.data.memory_usage(index=True).sum()
+
+# the first load fills the three day buffer, so it is reported separately
+print('size of one padded day (MB): {:.1f}'.format(day_bytes / 1024.**2))
+print('first load: {:.3f} s, pad stage {:.3f} s'.format(times[0], 
+                                                        pad_times[0]))
+print('later loads: {:.3f} s, pad stage {:.3f} s'.format(np.mean(times[1:]),
+      np.mean(pad_times[1:])))
+print('later loads: {:.1f} concat/copy calls, {:.1f} MB copied '
+      '({:.1f} days)'.format(np.mean(calls[1:]), 
+                             np.mean(copied[1:]) / 1024.**2,
+                             np.mean(copied[1:]) / day_bytes))
@@ -2,6 +2,11 @@
 from __future__ import print_function
 from __future__ import absolute_import
 import os
+import logging
+
+# library logging, silent unless configured by user
+# pysat.instrument, pysat.files, and pysat.orbits loggers are children
+logging.getLogger('pysat').addHandler(logging.NullHandler())
 
 # set version
 here = os.path.abspath(os.path.dirname(__file__))
@@ -39,6 +44,7 @@ from ._meta import Meta
 from ._files import Files
 from ._custom import Custom
 from ._orbits import Orbits
+from ._netcdf4_writer import NetCDF4Writer
 from . import instruments
 from . import ssnl
 
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Columnar storage of processed Instrument data using pyarrow.
+
+Each cached day is a directory holding the 1D data, one table per
+column of profiles (2D data), and the pickled metadata. The metadata is
+written last and marks the entry as complete.
+"""
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import json
+import numpy as np
+import pandas as pds
+
+from pysat import DataFrame, Series
+
+formats = ('arrow', 'parquet')
+
+
+def exists(path):
+    """True if a complete cache entry is stored at path"""
+    return os.path.isfile(os.path.join(path, 'meta.pkl'))
+
+
+def write(path, data, meta, format='arrow'):
+    """Store data and metadata in the cache directory path.
+
+    Parameters
+    ----------
+    path : string
+        directory for this cache entry
+    data : pandas.DataFrame
+        processed Instrument data
+    meta : pysat.Meta
+        metadata for data
+    format : string
+        'arrow' (default) for uncompressed Arrow IPC files, which are read
+        back memory-mapped, or 'parquet' for compressed Parquet files
+
+    """
+    if format not in formats:
+        raise ValueError("format must be 'arrow' or 'parquet'")
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    # profiles are stored separately, their lengths stored in data
+    flat = data.copy()
+    profiles = {}
+    for col in data.columns:
+        if data[col].dtype != np.dtype('O'):
+            continue
+        frames = data[col].tolist()
+        if not isinstance(frames[0], (DataFrame, Series)):
+            continue
+        is_frame = isinstance(frames[0], DataFrame)
+        stacked = pds.concat(frames)
+        if not is_frame:
+            stacked = stacked.to_frame(name='values')
+        flat[col] = np.array([len(item) for item in frames])
+        profiles[col] = {'series': not is_frame,
+                         'name': None if is_frame else frames[0].name}
+        _write_table(os.path.join(path, 'profile_' + col + '.' + format),
+                     stacked, format)
+
+    _write_table(os.path.join(path, 'data.' + format), flat, format,
+                 {'pysat_profiles': profiles})
+    pds.to_pickle(meta, os.path.join(path, 'meta.pkl'))
+
+
+def read(path, format='arrow'):
+    """Load data and metadata stored in the cache directory path.
+
+    Returns
+    -------
+    data : pandas.DataFrame
+    meta : pysat.Meta
+
+    """
+    data, extra = _read_table(os.path.join(path, 'data.' + format), format)
+    profiles = extra.get('pysat_profiles', {})
+    for col in profiles:
+        stacked, _ = _read_table(os.path.join(path,
+                                              'profile_' + col + '.' + format),
+                                 format)
+        if profiles[col]['series']:
+            stacked = stacked['values']
+            stacked.name = profiles[col]['name']
+        # split stacked profiles using the stored lengths
+        stops = np.cumsum(data[col].values)
+        starts = stops - data[col].values
+        # filled one at a time, pandas may otherwise try to broadcast
+        # equal length profiles into a 2D array
+        items = np.empty(len(starts), dtype=object)
+        for i, (start, stop) in enumerate(zip(starts, stops)):
+            items[i] = stacked.iloc[start:stop]
+        data[col] = Series(items, index=data.index)
+    meta = pds.read_pickle(os.path.join(path, 'meta.pkl'))
+    return data, meta
+
+
+def _write_table(fname, frame, format, extra=None):
+    """Write frame, with its index, to fname"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    if extra is not None:
+        schema_meta = dict(table.schema.metadata or {})
+        schema_meta[b'pysat'] = json.dumps(extra).encode('utf-8')
+        table = table.replace_schema_metadata(schema_meta)
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, fname)
+    else:
+        with pa.OSFile(fname, 'wb') as sink:
+            # pyarrow.ipc.new_file was added in 0.12
+            writer = pa.RecordBatchFileWriter(sink, table.schema)
+            try:
+                writer.write_table(table)
+            finally:
+                writer.close()
+
+
+def _read_table(fname, format):
+    """Read fname into a DataFrame, also returning any pysat schema info"""
+    import pyarrow as pa
+
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        try:
+            table = pq.read_table(fname, memory_map=True)
+        except TypeError:
+            # memory_map keyword added in pyarrow 0.10
+            table = pq.read_table(fname)
+        # schema is read first, the table isn't usable after conversion
+        extra = _schema_extra(table)
+        return _to_pandas(table), extra
+    with pa.memory_map(fname, 'r') as source:
+        table = pa.open_file(source).read_all()
+        extra = _schema_extra(table)
+        # buffers from the map stay valid after it is closed, arrow holds
+        # its own reference to the mapped region
+        return _to_pandas(table), extra
+
+
+def _to_pandas(table):
+    """Convert table to a DataFrame without consolidating columns.
+
+    to_pandas normally copies every column into consolidated blocks. With
+    split_blocks, numeric columns without nulls may use the table's memory
+    directly, and self_destruct releases each column once converted.
+    Versions of pyarrow without these options copy.
+
+    """
+    try:
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    except TypeError:
+        return table.to_pandas()
+
+
+def _schema_extra(table):
+    """pysat information stored in the table's schema metadata"""
+    extra = {}
+    if (table.schema.metadata is not None) and \
+            (b'pysat' in table.schema.metadata):
+        extra = json.loads(table.schema.metadata[b'pysat'].decode('utf-8'))
+    return extra
@@ -1,8 +1,28 @@
 from __future__ import print_function
 from __future__ import absolute_import
 
+import os
+import time
+import datetime
+import numbers
+import hashlib
+import functools
+import types
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
 import pandas as pds
 
+try:
+    basestring
+except NameError:
+    basestring = str
+
+# values whose repr doesn't change between sessions
+_plain_types = (type(None), numbers.Number, basestring, bytes, 
+                datetime.date, datetime.time, datetime.timedelta, 
+                np.generic, np.dtype, pds.DateOffset)
+
 
 class Custom(object):
     """
@@ -37,6 +57,29 @@ class Custom(object):
     User should interact with Custom through pysat.Instrument instance's 
     attribute, instrument.custom
     
+    Functions may declare the columns they read and write by attaching
+    `inputs` and `outputs` lists to the function object. When
+    `requested` is set, only the functions needed to produce those
+    columns (plus all 'pass' functions) are run. When `cache_dir` is set,
+    columns produced by 'add' functions with declared outputs are stored
+    on disk and reused by later loads of the same data. Functions whose
+    arguments or closures hold objects without a stable fingerprint, such
+    as class instances, are not cached.
+    
+    Attributes
+    ----------
+    requested : list of strings or None
+        column names needed by the user. None (default) runs every function.
+    cache_dir : string or None
+        directory used to cache derived columns. None (default) disables
+        caching.
+    max_workers : int or None
+        number of threads used to run independent 'add' and 'pass' 
+        functions concurrently. Results are merged in queue order.
+        None (default) runs all functions serially. Only a thread pool is
+        implemented, so functions overlap only while they release the GIL,
+        as numpy does for most array operations.
+    
     """
 
     def __init__(self):
@@ -48,6 +91,15 @@ class Custom(object):
         self._args = []
         # keyword arguments to functions
         self._kwargs = []
+        # columns read and written by functions, None if not declared
+        self._inputs = []
+        self._outputs = []
+        # columns requested by user, None runs everything
+        self.requested = None
+        # location of derived column cache, None disables caching
+        self.cache_dir = None
+        # number of threads for independent functions, None runs serially
+        self.max_workers = None
 
     def add(self, function, kind='add', at_pos='end',*args, **kwargs):
         """Add a function to custom processing queue. 
@@ -92,12 +144,24 @@ class Custom(object):
         - pandas Series, .name required 
         
         - (string/list of strings, numpy array/list of arrays) 
+        
+        Columns used by the function may be declared through attributes on
+        the function object, `function.inputs` and `function.outputs`, 
+        lists of column names. Functions without declarations are presumed
+        to read and write every column.
                                                           
         """
 
         if isinstance(function, str):
             # convert string to function object
             function=eval(function)
+        # pull out any declared column dependencies
+        inputs = getattr(function, 'inputs', None)
+        outputs = getattr(function, 'outputs', None)
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if isinstance(outputs, str):
+            outputs = [outputs]
 
         if (at_pos == 'end') | (at_pos == len(self._functions)):
             # store function object
@@ -105,12 +169,16 @@ class Custom(object):
             self._args.append(args)
             self._kwargs.append(kwargs)
             self._kind.append(kind.lower())
+            self._inputs.append(inputs)
+            self._outputs.append(outputs)
         elif at_pos < len(self._functions):
             # user picked a specific location to insert
             self._functions.insert(at_pos, function)
             self._args.insert(at_pos, args)
             self._kwargs.insert(at_pos, kwargs)
-            self._kind.insert(at_pos, kind)
+            self._kind.insert(at_pos, kind.lower())
+            self._inputs.insert(at_pos, inputs)
+            self._outputs.insert(at_pos, outputs)
         else:
             raise TypeError('Must enter an index between 0 and %i' % len(self._functions))
 
@@ -119,91 +187,377 @@ class Custom(object):
         Apply all of the custom functions to the satellite data object.
         """
         if len(self._functions) > 0:
-            for func, arg, kwarg, kind in zip(self._functions, self._args, 
-                                                self._kwargs, self._kind):
-                if len(sat.data) > 0:     
+            # only run the functions needed for requested columns,
+            # falling back upon any column projection set on the Instrument
+            requested = self.requested
+            if requested is None:
+                requested = getattr(sat, 'columns', None)
+            run = self._select_functions(requested)
+            keys = None
+            if (self.cache_dir is not None) and (len(sat.data) > 0):
+                keys = self._cache_keys(sat)
+            for batch in self._batches(run):
+                if len(sat.data) == 0:
+                    break
+                # check for previously derived columns
+                cache_files = {}
+                todo = []
+                for i in batch:
+                    if ((self._kind[i] == 'add') and (keys is not None) and
+                            (keys[i] is not None) and
+                            (self._outputs[i] is not None)):
+                        cache_files[i] = os.path.join(self.cache_dir,
+                                                      keys[i] + '.pkl')
+                        if os.path.isfile(cache_files[i]):
+                            self._restore_cached(sat, cache_files[i],
+                                                 self._outputs[i])
+                            continue
+                    todo.append(i)
+                
+                if getattr(sat, 'profile_load', False):
+                    tic = time.time()
+                # results are merged back in queue order
+                for i, result in zip(todo, self._run_batch(sat, todo)):
+                    kind = self._kind[i]
                     if kind == 'add':
                         # apply custom functions that add data to the instrument object
-                        tempd = sat.copy()
-                        newData = func(tempd, *arg, **kwarg)
-                        del tempd
-                        
-                        # process different types of data returned by the function
-                        
-                        # if a dict is returned, data in 'data'
-                        if isinstance(newData,dict):
-                            # if DataFrame returned, add Frame to existing frame
-                            if isinstance(newData['data'], pds.DataFrame):
-                                sat[newData['data'].columns] = newData
-                            # if a series is returned, add it as a column
-                            elif isinstance(newData['data'], pds.Series):
-                                # look for name attached to series first
-                                if newData['data'].name is not None:
-                                    sat[newData['data'].name] = newData
-                                # look if name is provided as part of dict returned
-                                # from function
-                                elif 'name' in newData.keys():
-                                    name = newData.pop('name')
-                                    sat[name] = newData
-                                # couldn't find name information
-                                else:
-                                    raise ValueError('Must assign a name to Series'+
-                                            ' or return a "name" in dictionary.')
-                                            
-                            # some kind of iterable was returned
-                            elif hasattr(newData['data'], '__iter__'):
-                                # look for name in returned dict
-                                if 'name' in newData.keys():
-                                    name = newData.pop('name')
-                                    sat[name] = newData
-                                else:
-                                    raise ValueError('Must include "name" in returned dictionary.')
-                                    
-                        # bare DataFrame is returned
-                        elif isinstance(newData, pds.DataFrame):
-                            sat[newData.columns] = newData
-                        # bare Series is returned, name must be attached to Series
-                        elif isinstance(newData, pds.Series):
-                            sat[newData.name] = newData      
-                            
-                        # some kind of iterable returned,
-                        # presuming (name, data)
-                        # or ([name1,...], [data1,...])                      
-                        elif hasattr(newData, '__iter__'):
-                            # falling back to older behavior
-                            # unpack tuple/list that was returned
-                            newName = newData[0]
-                            newData = newData[1]
-                            if len(newData)>0:
-                                # doesn't really check ensure data, there could
-                                # be multiple empty arrays returned, [[],[]]
-                                if isinstance(newName, str):
-                                    # one item to add
-                                    sat[newName] = newData
-                                else:    		
-                                    # multiple items
-                                    for name, data in zip(newName, newData):
-                                        if len(data)>0:        
-                                            # fixes up the incomplete check from before
-                                            sat[name] = data
-                        else:
-                            raise ValueError("kernel doesn't know what to do with returned data.")
-                            
+                        self._add_data(sat, result)
+                        if i in cache_files:
+                            self._store_cached(sat, cache_files[i], 
+                                               self._outputs[i])
                     # modifying loaded data
-                    if kind == 'modify':
-                        t = func(sat,*arg,**kwarg)
-                        if t is not None:
+                    elif kind == 'modify':
+                        if result is not None:
                             raise ValueError('Modify functions should not return any information via return. '+ 
                                              'Information may only be propagated back by modifying supplied ' +
                                              'pysat object.')
-                                             
                     # pass function (function runs, no data allowed back)
-                    if kind == 'pass':
-                        tempd = sat.copy()
-                        t = func(tempd,*arg,**kwarg)
-                        del tempd
-                        if t is not None:
+                    elif kind == 'pass':
+                        if result is not None:
                             raise ValueError('Pass functions should not return any information via return.')
+                if getattr(sat, 'profile_load', False) and (len(todo) > 0):
+                    names = [getattr(self._functions[i], '__name__', 
+                                     repr(self._functions[i])) for i in todo]
+                    sat._record_stage('custom: ' + ', '.join(names), tic,
+                                      sat.data)
+
+    def _run_batch(self, sat, todo):
+        """Run a group of independent functions from the queue.
+        
+        'add' and 'pass' functions are supplied a copy of the Instrument,
+        'modify' functions the Instrument itself. Groups are run on a
+        thread pool when max_workers is set.
+        
+        Parameters
+        ----------
+        sat : pysat.Instrument
+            Instrument object with loaded data
+        todo : list of ints
+            positions of functions in queue to be run
+            
+        Returns
+        -------
+        list
+            values returned by each function, in queue order
+            
+        """
+        calls = []
+        for i in todo:
+            kind = self._kind[i]
+            if kind == 'modify':
+                calls.append((self._functions[i], sat))
+            elif (kind == 'add') or (kind == 'pass'):
+                calls.append((self._functions[i], sat.copy()))
+            else:
+                # unknown kinds are not run
+                calls.append((None, None))
+
+        if (self.max_workers is None) or (len(todo) < 2):
+            out = []
+            for i, (func, tempd) in zip(todo, calls):
+                if func is not None:
+                    out.append(func(tempd, *self._args[i], **self._kwargs[i]))
+                else:
+                    out.append(None)
+                del tempd
+            return out
+
+        pool = ThreadPool(min(self.max_workers, len(todo)))
+        try:
+            results = []
+            for i, (func, tempd) in zip(todo, calls):
+                results.append(pool.apply_async(func, 
+                                                (tempd,) + tuple(self._args[i]),
+                                                self._kwargs[i]))
+            out = [result.get() for result in results]
+        finally:
+            pool.close()
+            pool.join()
+        del calls
+        return out
+
+    def _batches(self, run):
+        """Group functions in queue into sets that may run concurrently.
+        
+        An 'add' or 'pass' function may join the current group only if it
+        declares inputs that are not produced by any 'add' function already
+        in the group. 'modify' functions are always run alone.
+        
+        Parameters
+        ----------
+        run : list of bools
+            True for each function in the queue to be run
+            
+        Returns
+        -------
+        list of lists of ints
+            positions of functions in queue, in queue order
+        
+        """
+        batches = []
+        current = []
+        for i in range(len(self._functions)):
+            if not run[i]:
+                continue
+            if (len(current) > 0) and self._independent(i, current):
+                current.append(i)
+            else:
+                if len(current) > 0:
+                    batches.append(current)
+                current = [i]
+        if len(current) > 0:
+            batches.append(current)
+        return batches
+
+    def _independent(self, i, current):
+        """True if function i does not depend upon functions in current."""
+        if self.max_workers is None:
+            return False
+        for j in [i] + current:
+            if (self._kind[j] != 'add') and (self._kind[j] != 'pass'):
+                return False
+        for j in current:
+            if self._kind[j] == 'add':
+                if (self._outputs[j] is None) or (self._inputs[i] is None):
+                    return False
+                if len(set(self._inputs[i]).intersection(self._outputs[j])) > 0:
+                    return False
+        return True
+
+    def _add_data(self, sat, newData):
+        """Add data returned by an 'add' function to the Instrument."""
+        # process different types of data returned by the function
+        
+        # if a dict is returned, data in 'data'
+        if isinstance(newData,dict):
+            # if DataFrame returned, add Frame to existing frame
+            if isinstance(newData['data'], pds.DataFrame):
+                sat[newData['data'].columns] = newData
+            # if a series is returned, add it as a column
+            elif isinstance(newData['data'], pds.Series):
+                # look for name attached to series first
+                if newData['data'].name is not None:
+                    sat[newData['data'].name] = newData
+                # look if name is provided as part of dict returned
+                # from function
+                elif 'name' in newData.keys():
+                    name = newData.pop('name')
+                    sat[name] = newData
+                # couldn't find name information
+                else:
+                    raise ValueError('Must assign a name to Series'+
+                            ' or return a "name" in dictionary.')
+                            
+            # some kind of iterable was returned
+            elif hasattr(newData['data'], '__iter__'):
+                # look for name in returned dict
+                if 'name' in newData.keys():
+                    name = newData.pop('name')
+                    sat[name] = newData
+                else:
+                    raise ValueError('Must include "name" in returned dictionary.')
+                    
+        # bare DataFrame is returned
+        elif isinstance(newData, pds.DataFrame):
+            sat[newData.columns] = newData
+        # bare Series is returned, name must be attached to Series
+        elif isinstance(newData, pds.Series):
+            sat[newData.name] = newData      
+            
+        # some kind of iterable returned,
+        # presuming (name, data)
+        # or ([name1,...], [data1,...])                      
+        elif hasattr(newData, '__iter__'):
+            # falling back to older behavior
+            # unpack tuple/list that was returned
+            newName = newData[0]
+            newData = newData[1]
+            if len(newData)>0:
+                # doesn't really check ensure data, there could
+                # be multiple empty arrays returned, [[],[]]
+                if isinstance(newName, str):
+                    # one item to add
+                    sat[newName] = newData
+                else:    		
+                    # multiple items
+                    for name, data in zip(newName, newData):
+                        if len(data)>0:        
+                            # fixes up the incomplete check from before
+                            sat[name] = data
+        else:
+            raise ValueError("kernel doesn't know what to do with returned data.")
+
+    def _select_functions(self, requested=None):
+        """Determine which functions are needed to produce requested columns.
+        
+        Walks the queue backwards, building up the set of columns needed
+        by the functions that will run. Functions without declared inputs
+        require everything upstream to run. 'pass' functions always run.
+        
+        Parameters
+        ----------
+        requested : list of strings or None
+            column names needed. None runs every function.
+        
+        Returns
+        -------
+        list of bools
+            True for each function in the queue that must be run
+            
+        """
+        run = [True]*len(self._functions)
+        if requested is None:
+            return run
+            
+        needed = set(requested)
+        need_all = False
+        for i in reversed(range(len(self._functions))):
+            outputs = self._outputs[i]
+            if (need_all or (outputs is None) or (self._kind[i] == 'pass') or
+                    (len(needed.intersection(outputs)) > 0)):
+                if self._inputs[i] is None:
+                    need_all = True
+                else:
+                    needed.update(self._inputs[i])
+            else:
+                run[i] = False
+        return run
+
+    def _required_columns(self, requested):
+        """Determine the loaded columns needed to produce requested columns.
+        
+        Parameters
+        ----------
+        requested : list of strings
+            column names needed by the user
+        
+        Returns
+        -------
+        set or None
+            names of columns that must be loaded. None if every column
+            may be needed by a function without declared inputs.
+            
+        """
+        needed = set()
+        added = set()
+        run = self._select_functions(requested)
+        for i in range(len(self._functions)):
+            if not run[i]:
+                continue
+            if self._inputs[i] is None:
+                return None
+            # columns added by an earlier function don't need to be loaded
+            needed.update(set(self._inputs[i]) - added)
+            if (self._kind[i] == 'add') and (self._outputs[i] is not None):
+                added.update(self._outputs[i])
+        return needed.union(set(requested) - added)
+
+    def _cache_keys(self, sat):
+        """Generate unique keys for the output of each function in queue.
+        
+        Keys depend upon the loaded files, the function's code and its 
+        arguments, and the keys of every earlier function the function 
+        depends upon.
+        
+        Parameters
+        ----------
+        sat : pysat.Instrument
+            Instrument object with loaded data
+            
+        Returns
+        -------
+        list of strings
+            hex digest for each function in the queue, None for functions
+            whose output can't be identified between sessions
+            
+        """
+        # loaded files identified by name, modification time, and size
+        base = '_'.join((sat.platform, sat.name, sat.tag, sat.sat_id,
+                         sat.clean_level, str(sat.data.index[0]),
+                         str(sat.data.index[-1]), str(len(sat.data)),
+                         repr(sat._source_file_stats())))
+        keys = []
+        for i, (func, arg, kwarg) in enumerate(zip(self._functions, 
+                                                   self._args, self._kwargs)):
+            # function contents and full argument values, see _update_digest
+            digest = hashlib.md5()
+            try:
+                for item in (func, arg, kwarg):
+                    _update_digest(digest, item)
+            except TypeError:
+                keys.append(None)
+                continue
+            parts = [base, digest.hexdigest()]
+            # include upstream functions that may produce our inputs
+            for j in range(i):
+                if self._kind[j] == 'pass':
+                    continue
+                if ((self._inputs[i] is None) or (self._outputs[j] is None) or
+                        (len(set(self._inputs[i]).intersection(self._outputs[j])) > 0)):
+                    parts.append(keys[j])
+            if None in parts:
+                # upstream output can't be identified
+                keys.append(None)
+            else:
+                keys.append(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+        return keys
+        
+    def _fingerprint(self):
+        """Hex digest identifying the functions in the queue and their
+        arguments, None if any of them can't be identified between 
+        sessions."""
+        digest = hashlib.md5()
+        try:
+            for func, kind, arg, kwarg in zip(self._functions, self._kind,
+                                              self._args, self._kwargs):
+                digest.update(kind.encode('utf-8'))
+                _update_digest(digest, func)
+                _update_digest(digest, arg)
+                _update_digest(digest, kwarg)
+        except TypeError:
+            return None
+        return digest.hexdigest()
+
+    def _store_cached(self, sat, cache_file, outputs):
+        """Store derived columns, and metadata, to disk."""
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        meta = {}
+        for col in outputs:
+            if col in sat.meta:
+                meta[col] = sat.meta[col].to_dict()
+        pds.to_pickle({'data': sat.data[outputs], 'meta': meta}, cache_file)
+
+    def _restore_cached(self, sat, cache_file, outputs):
+        """Attach derived columns, and metadata, stored on disk."""
+        stored = pds.read_pickle(cache_file)
+        for col in outputs:
+            if col in stored['meta']:
+                new = stored['meta'][col].copy()
+                new['data'] = stored['data'][col]
+                sat[col] = new
+            else:
+                sat[col] = stored['data'][col]
 
     def clear(self):
         """Clear custom function list."""
@@ -211,7 +565,88 @@ class Custom(object):
         self._args=[]
         self._kwargs=[]
         self._kind=[]
+        self._inputs=[]
+        self._outputs=[]
 
 ######################################################
 ##### END CUSTOM CLASS ##############################
 ####################################################
+
+
+def _update_digest(digest, value, _seen=None):
+    """Add value to the hashlib digest.
+
+    Functions contribute their bytecode, constants, default arguments, and
+    closure contents, so edited functions produce new digests. Arrays
+    contribute their full contents rather than a truncated repr.
+
+    Raises
+    ------
+    TypeError
+        if value, or anything it holds, has no representation that is
+        the same in every session, e.g. instances of most classes
+
+    """
+    if isinstance(value, functools.partial):
+        digest.update(b'partial')
+        for item in (value.func, value.args, value.keywords or {}):
+            _update_digest(digest, item, _seen)
+    elif hasattr(value, '__func__'):
+        # bound method
+        _update_digest(digest, value.__func__, _seen)
+    elif hasattr(value, '__code__'):
+        # recursive functions hold themselves in their closure
+        _seen = set() if _seen is None else _seen
+        if id(value) in _seen:
+            digest.update(b'recursion')
+            return
+        _seen.add(id(value))
+        digest.update(getattr(value, '__module__', '').encode('utf-8'))
+        digest.update(getattr(value, '__name__', '').encode('utf-8'))
+        _update_digest(digest, value.__code__, _seen)
+        _update_digest(digest, value.__defaults__, _seen)
+        _update_digest(digest, getattr(value, '__kwdefaults__', None), 
+                       _seen)
+        cells = value.__closure__ or ()
+        _update_digest(digest, tuple(cell.cell_contents for cell in cells),
+                       _seen)
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        # constants include any nested functions' code
+        _update_digest(digest, value.co_consts, _seen)
+        _update_digest(digest, value.co_names, _seen)
+    elif isinstance(value, (pds.Series, pds.DataFrame, pds.Index)):
+        digest.update(type(value).__name__.encode('utf-8'))
+        if not isinstance(value, pds.Index):
+            _update_digest(digest, value.index, _seen)
+        if isinstance(value, pds.DataFrame):
+            _update_digest(digest, list(value.columns), _seen)
+        _update_digest(digest, np.asarray(value.values), _seen)
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode('utf-8'))
+        if value.dtype == np.dtype('O'):
+            _update_digest(digest, value.tolist(), _seen)
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode('utf-8'))
+        for item in value:
+            _update_digest(digest, item, _seen)
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value.keys(), key=repr):
+            _update_digest(digest, key, _seen)
+            _update_digest(digest, value[key], _seen)
+    elif isinstance(value, _plain_types):
+        digest.update(type(value).__name__.encode('utf-8'))
+        digest.update(repr(value).encode('utf-8'))
+    elif isinstance(value, (type, types.ModuleType, types.BuiltinFunctionType,
+                            np.ufunc)):
+        # identified by name, builtin methods of instances are not
+        owner = getattr(value, '__self__', None)
+        if (owner is not None) and not isinstance(owner, types.ModuleType):
+            raise TypeError('Unable to fingerprint ' + repr(value))
+        digest.update(repr(getattr(value, '__module__', None)).encode('utf-8'))
+        digest.update(value.__name__.encode('utf-8'))
+    else:
+        raise TypeError('Unable to fingerprint ' + repr(value))
@@ -6,10 +6,13 @@ import os
 import weakref
 import re
 import glob
+import logging
 import numpy as np
 import pandas as pds
 from pysat import data_dir as data_dir
 
+logger = logging.getLogger('pysat.files')
+
 class Files(object):
     """Maintains collection of files for instrument object.
     
@@ -147,8 +150,8 @@ class Files(object):
                 estr = 'WARNING! Duplicate datetimes in provided file '
                 estr = '{:s}information.\nKeeping one of each '.format(estr)
                 estr = '{:s}of the duplicates, dropping the rest.'.format(estr)
-                print(estr)
-                print(files_info.index.get_duplicates())
+                logger.warning(estr)
+                logger.warning('%s', files_info.index.get_duplicates())
 
                 idx = np.unique(files_info.index, return_index=True)
                 files_info = files_info.ix[idx[1]]
@@ -242,24 +245,26 @@ class Files(object):
 
         """
 
-        output_str = '{platform} {name} {tag} {sat_id}'
-        output_str = output_str.format(platform=self._sat.platform,
-                                       name=self._sat.name, tag=self._sat.tag, 
-                                       sat_id=self._sat.sat_id)
-        output_str = " ".join(("pysat is searching for", output_str, "files."))
-        output_str = " ".join(output_str.split())
-        print (output_str)
+        if logger.isEnabledFor(logging.INFO):
+            output_str = '{platform} {name} {tag} {sat_id}'
+            output_str = output_str.format(platform=self._sat.platform,
+                                           name=self._sat.name,
+                                           tag=self._sat.tag, 
+                                           sat_id=self._sat.sat_id)
+            output_str = " ".join(("pysat is searching for", output_str, 
+                                   "files."))
+            logger.info(" ".join(output_str.split()))
         
         info = self._sat._list_rtn(tag=self._sat.tag, sat_id=self._sat.sat_id,
                                    data_path=self.data_path,
                                    format_str=self.file_format)
 
         if not info.empty:
-            print('Found {ll:d} of them.'.format(ll=len(info)))
+            logger.info('Found %d of them.', len(info))
         else:
             estr = "Unable to find any files that match the supplied template. If you have the necessary files "
             estr = "{:s}please check pysat settings and file ".format(estr)
-            print("{:s}locations.".format(estr))
+            logger.warning("{:s}locations.".format(estr))
         info = self._remove_data_dir_path(info)
         self._attach_files(info)
         self._store()
@@ -6,9 +6,14 @@ import string
 import os
 import copy
 import sys
+import time
+import logging
+import tempfile
+import collections
 import pandas as pds
 import numpy as np
 
+from . import _arrow_cache
 from . import _custom
 from . import _files
 from . import _orbits
@@ -17,6 +22,8 @@ from . import utils
 from pysat import data_dir
 from pysat import DataFrame, Series
 
+logger = logging.getLogger('pysat.instrument')
+
 
 # main class for users
 class Instrument(object):
@@ -67,6 +74,30 @@ class Instrument(object):
         month, and sat_id will be filled in as needed using python string
         formatting.  The default file format structure is supplied in the
         instrument list_files routine.
+    profile_load : boolean, optional
+        If True, wall time, number of rows, and memory used is recorded for
+        each stage of load. See load_stats and load_report.
+    columns : list of strings, optional
+        Data variables to load. Columns needed by the instrument default and
+        clean routines and custom functions are loaded as well, then
+        removed at the end of load. The orbit index is always retained.
+        None (default) loads every column.
+    cache_dir : string, optional
+        Directory used to store each processed day (after clean and custom
+        functions) in a columnar format using pyarrow. Later loads of the 
+        same day, instrument, clean_level, custom queue, and options read
+        the stored day instead. Days aren't cached when a custom function
+        or its arguments can't be fingerprinted, see Custom. None 
+        (default) disables the cache.
+    cache_format : string, optional
+        'arrow' (default) for uncompressed Arrow IPC files, read back
+        memory-mapped, or 'parquet' for smaller Parquet files.
+    mmap_dir : string, optional
+        Scratch directory used to back the numeric columns of each loaded
+        day with memory-mapped files, so the days held for padding and
+        multi_file_day support are kept out of RAM. The padded window is
+        mapped as well. The files are removed once no longer used. None
+        (default) keeps all data in memory.
                
     Attributes
     ----------
@@ -90,6 +121,11 @@ class Instrument(object):
         interface to instrument nano-kernel
     kwargs : dictionary
         keyword arguments passed to instrument loading routine
+    load_stats : pandas.DataFrame
+        time, rows, and bytes for each stage of the last load, populated
+        if profile_load is True
+    columns : list of strings or None
+        data variables returned by load, None returns all
     
     Note
     ----
@@ -139,7 +175,8 @@ class Instrument(object):
                  clean_level='clean', update_files=None, pad=None,
                  orbit_info=None, inst_module=None, multi_file_day=None,
                  manual_org=None, directory_format=None, file_format=None,
-                 temporary_file_list=False,
+                 temporary_file_list=False, profile_load=False, columns=None,
+                 cache_dir=None, cache_format='arrow', mmap_dir=None,
                  *arg, **kwargs):
 
         if inst_module is None:
@@ -260,6 +297,25 @@ class Instrument(object):
         # store kwargs, passed to load routine
         self.kwargs = kwargs        
 
+        # load profiling, stats for each stage of load
+        self.profile_load = profile_load
+        self.load_stats = DataFrame(None)
+        self._load_records = []
+        self._load_history = []
+
+        # column projection, None loads everything
+        self.columns = columns
+
+        # processed data cache, None disables
+        self.cache_dir = cache_dir
+        if cache_format not in _arrow_cache.formats:
+            raise ValueError("cache_format must be 'arrow' or 'parquet'")
+        self.cache_format = cache_format
+
+        # scratch directory for memory-mapped data, None disables
+        self.mmap_dir = mmap_dir
+        self._scratch_files = []
+
         # run instrument init function, a basic pass function is used
         # if user doesn't supply the init function
         self._init_rtn(self)
@@ -367,6 +423,11 @@ class Instrument(object):
         self.file_format = None
         self.multi_file_day = False
         self.orbit_info = None
+        # columns needed by default and clean, None if not declared
+        self._required_columns = None
+        self._load_takes_columns = False
+        # True if load reads any number of files in one call
+        self._multi_file_load = False
                         
         if by_name: 
             # look for code with filename name, any errors passed up
@@ -386,6 +447,7 @@ class Instrument(object):
         except AttributeError:
             estr = 'A load, file_list, and download routine are required for '
             raise AttributeError('{:s}every instrument.'.format(estr))
+        self._load_takes_columns = self._accepts_keyword(inst.load, 'columns')
         try:
             self._default_rtn = inst.default
         except AttributeError:
@@ -412,9 +474,61 @@ class Instrument(object):
             self.orbit_info = inst.orbit_info
         except AttributeError:
             pass
+        try:
+            self._required_columns = inst.required_columns
+        except AttributeError:
+            pass
+        try:
+            self._multi_file_load = inst.multi_file_load
+        except AttributeError:
+            pass
 
         return
 
+    @staticmethod
+    def _accepts_keyword(func, keyword):
+        """Return True if func explicitly accepts keyword."""
+        import inspect
+        try:
+            params = inspect.signature(func).parameters
+            return keyword in params
+        except AttributeError:
+            # python 2, unwrap any functools.partial
+            if hasattr(func, 'func'):
+                func = func.func
+            try:
+                return keyword in inspect.getargspec(func).args
+            except TypeError:
+                return False
+
+    def _projected_columns(self):
+        """Determine the columns that must be loaded to satisfy self.columns.
+        
+        Returns
+        -------
+        list of strings or None
+            column names to load, None if every column is needed
+            
+        """
+        if self.columns is None:
+            return None
+        requested = list(self.columns)
+        if self.custom.requested is not None:
+            requested.extend(self.custom.requested)
+        needed = self.custom._required_columns(requested)
+        if needed is None:
+            return None
+        # default and clean routines may use any column unless declared
+        if ((self._default_rtn != self._pass_func) or
+                ((self._clean_rtn != self._pass_func) and
+                 (self.clean_level != 'none'))):
+            if self._required_columns is None:
+                return None
+            needed.update(self._required_columns)
+        if self.orbits.orbit_index is not None:
+            needed.add(self.orbits.orbit_index)
+        return sorted(needed)
+
     def __repr__(self):
 
         output_str = '\npysat Instrument object\n'
@@ -480,15 +594,21 @@ class Instrument(object):
 
         return output_str
 
-    def _load_data(self, date=None, fid=None):
+    def _load_data(self, date=None, fid=None, stop=None):
         """
         Load data for an instrument on given date or fid, dependng upon input.
         
+        If stop is supplied, files from date up to stop are loaded in one
+        batch, or one at a time if the instrument load routine doesn't
+        support reading many files at once.
+        
         """
 
         if fid is not None:
             # get filename based off of index value
             fname = self.files[fid:fid+1]
+        elif (date is not None) and (stop is not None):
+            fname = self.files[date:stop]
         elif date is not None:
             fname = self.files[date: date+pds.DateOffset(days=1)]
         else:
@@ -496,38 +616,232 @@ class Instrument(object):
    
         if len(fname) > 0:    
             load_fname = [os.path.join(self.files.data_path, f) for f in fname]
-            data, mdata = self._load_rtn(load_fname, tag=self.tag,
-                                         sat_id=self.sat_id, **self.kwargs)
+            if self.profile_load:
+                tic = time.time()
+            columns = self._projected_columns()
+            if (stop is not None) and (not self._multi_file_load) and \
+                    (len(load_fname) > 1):
+                loaded = [self._call_load_rtn([f], columns) 
+                          for f in load_fname]
+                frames = [item[0] for item in loaded if not item[0].empty]
+                mdata = loaded[0][1]
+                if len(frames) > 0:
+                    mdata = [item[1] for item in loaded 
+                             if not item[0].empty][0]
+                if len(frames) > 1:
+                    # single concatenation for the whole range
+                    data = pds.concat(frames)
+                elif len(frames) == 1:
+                    data = frames[0]
+                else:
+                    data = DataFrame(None)
+            else:
+                data, mdata = self._call_load_rtn(load_fname, columns)
+            if (columns is not None) and (not data.empty):
+                # drop anything the load routine couldn't skip
+                keep = [col for col in data.columns if col in columns]
+                if len(keep) < len(data.columns):
+                    data = data[keep]
+            if self.mmap_dir is not None:
+                data = self._memory_map(data)
+            if self.profile_load:
+                self._record_stage('load_rtn', tic, data)
         else:
             data = DataFrame(None)
             mdata = _meta.Meta()
 
-        output_str = '{platform} {name} {tag} {sat_id}'
-        output_str = output_str.format(platform=self.platform,
-                                       name=self.name, tag=self.tag, 
-                                       sat_id=self.sat_id)
         if not data.empty: 
             if not isinstance(data, DataFrame):
                 raise TypeError(' '.join(('Data returned by instrument load',
                                 'routine must be a pandas.DataFrame')))
             if not isinstance(mdata, _meta.Meta):
                 raise TypeError('Metadata returned must be a pysat.Meta object')
-            if date is not None:
-                output_str = ' '.join(('Returning', output_str, 'data for', date.strftime('%D')))
-            else:
-                if len(fname) == 1:
-                    # this check was zero
-                    output_str = ' '.join(('Returning', output_str, 'data from', fname[0]))
+
+        # only build status message if it will be used
+        if logger.isEnabledFor(logging.INFO):
+            output_str = '{platform} {name} {tag} {sat_id}'
+            output_str = output_str.format(platform=self.platform,
+                                           name=self.name, tag=self.tag, 
+                                           sat_id=self.sat_id)
+            if not data.empty: 
+                if date is not None:
+                    output_str = ' '.join(('Returning', output_str, 'data for', date.strftime('%D')))
                 else:
-                    output_str = ' '.join(('Returning', output_str, 'data from', fname[0], '::', fname[-1]))
-        else:
-            # no data signal
-            output_str = ' '.join(('No', output_str, 'data for', date.strftime('%D')))
-        # remove extra spaces, if any
-        output_str = " ".join(output_str.split())
-        print (output_str)                
+                    if len(fname) == 1:
+                        # this check was zero
+                        output_str = ' '.join(('Returning', output_str, 'data from', fname[0]))
+                    else:
+                        output_str = ' '.join(('Returning', output_str, 'data from', fname[0], '::', fname[-1]))
+            elif date is not None:
+                # no data signal
+                output_str = ' '.join(('No', output_str, 'data for', date.strftime('%D')))
+            else:
+                output_str = ' '.join(('No', output_str, 'data for file id', str(fid)))
+            # remove extra spaces, if any
+            logger.info(" ".join(output_str.split()))
         return data, mdata
+
+    def _call_load_rtn(self, load_fname, columns):
+        """Call the instrument load routine on the list load_fname."""
+        if (columns is not None) and self._load_takes_columns:
+            return self._load_rtn(load_fname, tag=self.tag, 
+                                  sat_id=self.sat_id, columns=columns, 
+                                  **self.kwargs)
+        return self._load_rtn(load_fname, tag=self.tag, sat_id=self.sat_id,
+                              **self.kwargs)
+        
+    def _memory_map(self, data):
+        """Move the numeric columns of data into memory-mapped scratch files.
         
+        Parameters
+        ----------
+        data : pandas.DataFrame
+            data returned by the instrument load routine
+            
+        Returns
+        -------
+        pandas.DataFrame
+            data with numeric columns backed by files in mmap_dir
+            
+        """
+        # remove files that couldn't be removed while mapped
+        self._remove_scratch_files(list(self._scratch_files))
+        if data.empty:
+            return data
+        if not os.path.isdir(self.mmap_dir):
+            os.makedirs(self.mmap_dir)
+
+        # one scratch file per dtype, holding a 2D block of those columns
+        positions = collections.OrderedDict()
+        for pos, col in enumerate(data.columns):
+            values = data.iloc[:, pos].values
+            if isinstance(values, np.ndarray) and \
+                    (values.dtype.kind in ['b', 'i', 'u', 'f']):
+                positions.setdefault(values.dtype, []).append(pos)
+        blocks = []
+        new_files = []
+        for dtype in positions:
+            handle, fname = tempfile.mkstemp(dir=self.mmap_dir,
+                                             suffix='.dat')
+            os.close(handle)
+            mapped = np.memmap(fname, dtype=dtype, mode='w+',
+                               shape=(len(positions[dtype]), len(data)))
+            for i, pos in enumerate(positions[dtype]):
+                mapped[i] = data.iloc[:, pos].values
+            new_files.append(fname)
+            blocks.append((positions[dtype], mapped))
+        # files may be unlinked while mapped on POSIX systems, disk space
+        # is reclaimed when the data is no longer referenced
+        self._remove_scratch_files(new_files)
+        return self._frame_from_blocks(data, blocks)
+
+    @staticmethod
+    def _frame_from_blocks(data, blocks):
+        """Copy of data with columns replaced by rows of 2D blocks.
+
+        Parameters
+        ----------
+        data : pandas.DataFrame
+            original data
+        blocks : list of tuples
+            (column positions, 2D array with one row per position)
+
+        Note
+        ----
+        Before pandas 2.0 the DataFrame constructor consolidates columns
+        into new blocks, copying them, so the frame is assembled from a
+        BlockManager instead. Columns of a dtype that is mapped and later
+        added to the frame cause pandas to consolidate, and copy, that
+        block.
+
+        """
+        if int(pds.__version__.split('.')[0]) < 2:
+            from pandas.core.internals import BlockManager, make_block
+            mgr_blocks = []
+            mapped = set()
+            for positions, values in blocks:
+                mgr_blocks.append(make_block(values, placement=positions))
+                mapped.update(positions)
+            for pos in range(len(data.columns)):
+                if pos in mapped:
+                    continue
+                values = data.iloc[:, pos]._values
+                if isinstance(values, np.ndarray):
+                    values = values.reshape(1, len(values))
+                mgr_blocks.append(make_block(values, placement=[pos]))
+            return DataFrame(BlockManager(mgr_blocks,
+                                          [data.columns, data.index]))
+
+        columns = collections.OrderedDict((col, data[col].values)
+                                          for col in data.columns)
+        for positions, values in blocks:
+            for i, pos in enumerate(positions):
+                columns[data.columns[pos]] = values[i]
+        return DataFrame(columns, index=data.index, columns=data.columns,
+                         copy=False)
+
+    def _remove_scratch_files(self, fnames):
+        """Remove scratch files, retrying later any that are still in use."""
+        for fname in fnames:
+            if not os.path.isfile(fname):
+                continue
+            try:
+                os.remove(fname)
+            except OSError:
+                # still mapped on systems that don't allow removal
+                if fname not in self._scratch_files:
+                    self._scratch_files.append(fname)
+            else:
+                if fname in self._scratch_files:
+                    self._scratch_files.remove(fname)
+
+    def _assemble_pad_window(self, first_pad, last_pad, want_last_pad):
+        """Combine the buffered previous, current, and next data into the 
+        padded window using a single allocation.
+        
+        Parameters
+        ----------
+        first_pad : datetime
+            first time in window, inclusive
+        last_pad : datetime
+            last time in window
+        want_last_pad : boolean
+            if True, last_pad is included in window
+        
+        Returns
+        -------
+        pandas.DataFrame
+            padded data. Only times in the previous (next) data before
+            (after) the current data are used.
+            
+        """
+        curr = self._curr_data
+        if curr.empty:
+            return DataFrame(None)
+        side = 'right' if want_last_pad else 'left'
+
+        # locate the portion of each buffer in window, no data is copied
+        idx = curr.index
+        pieces = [curr.iloc[idx.searchsorted(first_pad, side='left'):
+                            idx.searchsorted(last_pad, side=side)]]
+        if not self._prev_data.empty:
+            idx = self._prev_data.index
+            start = idx.searchsorted(first_pad, side='left')
+            stop = idx.searchsorted(curr.index[0], side='left')
+            if stop > start:
+                pieces.insert(0, self._prev_data.iloc[start:stop])
+        if not self._next_data.empty:
+            idx = self._next_data.index
+            start = idx.searchsorted(curr.index[-1], side='right')
+            stop = idx.searchsorted(last_pad, side=side)
+            if stop > start:
+                pieces.append(self._next_data.iloc[start:stop])
+
+        if len(pieces) == 1:
+            # buffers aren't modified by processing of self.data
+            return pieces[0].copy()
+        return pds.concat(pieces)
+
     def _load_next(self):
         """Load the next days data (or file) without incrementing the date.
         Repeated calls will not advance date/file and will produce the same data
@@ -557,6 +871,143 @@ class Instrument(object):
         else:
             return self._load_data(fid=self._fid-1)
 
+    def _record_stage(self, stage, tic, data):
+        """Store wall time, rows, and bytes for a stage of load.
+        
+        Parameters
+        ----------
+        stage : string
+            name of load stage
+        tic : float
+            time stage started, from time.time()
+        data : pandas.DataFrame
+            data at end of stage
+        
+        Returns
+        -------
+        float
+            current time, used as start time for the next stage
+            
+        """
+        toc = time.time()
+        self._load_records.append({'stage': stage, 'time': toc - tic,
+                                   'rows': len(data),
+                                   'bytes': data.memory_usage(index=True).sum()})
+        return toc
+
+    def load_report(self, reset=False):
+        """Aggregate load statistics over all loads since the last reset.
+        
+        Parameters
+        ----------
+        reset : boolean
+            if True, stored statistics are cleared after report generated
+            
+        Returns
+        -------
+        pandas.DataFrame
+            number of calls, total and mean time, total rows and bytes, 
+            indexed by load stage
+            
+        Note
+        ----
+        Statistics are only recorded when profile_load is True.
+        
+        Examples
+        --------
+        ::
+        
+            inst = pysat.Instrument('pysat', 'testing', profile_load=True)
+            for inst in inst:
+                pass
+            print(inst.load_report())
+            
+        """
+        if len(self._load_history) == 0:
+            report = DataFrame(None, columns=['calls', 'time', 'mean_time',
+                                              'rows', 'bytes'])
+        else:
+            stats = pds.concat(self._load_history)
+            grouped = stats.groupby('stage', sort=False)
+            report = DataFrame({'calls': grouped['time'].count(),
+                                'time': grouped['time'].sum(),
+                                'mean_time': grouped['time'].mean(),
+                                'rows': grouped['rows'].sum(),
+                                'bytes': grouped['bytes'].sum()},
+                               columns=['calls', 'time', 'mean_time', 'rows', 
+                                        'bytes'])
+        if reset:
+            self._load_history = []
+        return report
+
+    def _processed_cache_path(self):
+        """Directory in cache_dir holding the processed data for self.date,
+        None if the custom functions can't be identified between sessions"""
+        import hashlib
+
+        fingerprint = self.custom._fingerprint()
+        if fingerprint is None:
+            return None
+        parts = [self.platform, self.name, self.tag, self.sat_id,
+                 self.clean_level, fingerprint, 
+                 repr(sorted(self.kwargs.items())), repr(self.pad), 
+                 repr(None if self.custom.requested is None
+                      else sorted(self.custom.requested)),
+                 repr(self.columns), repr(self.multi_file_day),
+                 repr(self.file_format), self.date.strftime('%Y-%m-%d'),
+                 repr(self._source_file_stats()), self.cache_format]
+        key = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        name = '_'.join((self.platform, self.name, self.tag, self.sat_id,
+                         self.date.strftime('%Y%m%d'), key))
+        return os.path.join(self.cache_dir, name)
+
+    def _source_file_stats(self):
+        """Name, modification time, and size of each file read for the
+        current date or file id, including any files read for padding.
+
+        Used to key cached results so data downloaded again is reprocessed.
+
+        """
+        if self._load_by_date and (self.date is not None):
+            start = self.date
+            stop = self.date + pds.DateOffset(days=1)
+            if self.pad is not None:
+                start = start - self.pad
+                stop = stop + self.pad
+            if self.multi_file_day:
+                start = start - pds.DateOffset(days=1)
+                stop = stop + pds.DateOffset(days=1)
+            start = pds.datetime(start.year, start.month, start.day)
+            fnames = self.files[start:stop]
+        elif self._fid is not None:
+            first = self._fid
+            last = self._fid + 1
+            if self.pad is not None:
+                first = max(0, first - 1)
+                last += 1
+            fnames = self.files[first:last]
+        else:
+            return []
+
+        from .instruments import file_cache
+
+        stats = []
+        for fname in fnames:
+            # full path as supplied to the instrument load routine
+            path = os.path.join(self.files.data_path, fname)
+            if not os.path.isfile(path):
+                # monthly files may be listed daily, with the date appended
+                try:
+                    path, _ = file_cache.split_fname(path)
+                except ValueError:
+                    pass
+            try:
+                info = os.stat(path)
+                stats.append((fname, info.st_mtime, info.st_size))
+            except OSError:
+                stats.append((fname, None, None))
+        return stats
+
     def _set_load_parameters(self, date=None, fid=None):
         self.date = date
         self._fid = fid
@@ -571,7 +1022,7 @@ class Instrument(object):
             self._load_by_date = False        
 
     def load(self, yr=None, doy=None, date=None, fname=None, fid=None, 
-             verifyPad=False):
+             verifyPad=False, columns=None, start=None, stop=None):
         """Load instrument data into Instrument object .data.
 
         Parameters
@@ -586,6 +1037,13 @@ class Instrument(object):
             filename to be loaded
         verifyPad : boolean 
             if True, padding data not removed (debug purposes)
+        columns : list of strings
+            data variables to load, replaces self.columns if supplied. 
+            Columns needed by processing are loaded then removed.
+        start : datetime object
+            beginning of a time range to load, must be used with stop
+        stop : datetime object
+            end of a time range to load, exclusive
 
         Returns
         --------
@@ -597,10 +1055,23 @@ class Instrument(object):
         by the user and added to the custom processing queue (.custom.add)
         are automatically applied to the data before it is available to 
         user in .data.
+
+        A time range is loaded by passing the files spanning the range 
+        (and any padding) to the instrument load routine together, followed 
+        by a single pass of the default, clean, and custom functions. The 
+        date attribute is set to the day containing start.
         
         """
         # set options used by loading routine based upon user input
-        if date is not None:
+        if (start is not None) or (stop is not None):
+            if (start is None) or (stop is None) or (stop <= start):
+                raise ValueError('Must supply both start and stop, with ' +
+                                 'stop after start.')
+            self._set_load_parameters(date=pds.datetime(start.year, 
+                                                        start.month, 
+                                                        start.day), 
+                                      fid=None)
+        elif date is not None:
             self._set_load_parameters(date=date, fid=None)
             # increment 
             inc = pds.DateOffset(days=1)
@@ -627,14 +1098,64 @@ class Instrument(object):
             estr = '{:s} to load data from.'.format(estr)
             raise TypeError(estr)
 
+        if (columns is not None) and (columns != self.columns):
+            # buffered pad data may be missing the new columns
+            self.columns = columns
+            self._next_data = DataFrame(None)
+            self._prev_data = DataFrame(None)
+
         self.orbits._reset()
+        if self.profile_load:
+            self._load_records = []
+
+        # processed days are only cached when loading by date
+        cache_path = None
+        if (self.cache_dir is not None) and self._load_by_date and \
+                (stop is None) and (not verifyPad):
+            cache_path = self._processed_cache_path()
+            if (cache_path is not None) and _arrow_cache.exists(cache_path):
+                if self.profile_load:
+                    tic = time.time()
+                self.data, self.meta = _arrow_cache.read(cache_path,
+                                                         self.cache_format)
+                # buffered days don't match the cached data
+                self._prev_data = DataFrame(None)
+                self._curr_data = DataFrame(None)
+                self._next_data = DataFrame(None)
+                self.meta.transfer_attributes_to_instrument(self)
+                if self.profile_load:
+                    self._record_stage('cache', tic, self.data)
+                    self._store_load_stats()
+                return
         # if pad  or multi_file_day is true, need to have a three day/file load
         loop_pad = self.pad if self.pad is not None else pds.DateOffset(seconds=0)   
-        if (self.pad is not None) | self.multi_file_day:
+        if stop is not None:
+            # buffered days don't border the range
+            self._prev_data = DataFrame(None)
+            self._curr_data = DataFrame(None)
+            self._next_data = DataFrame(None)
+            first_time = start
+            last_time = stop
+            want_last_pad = False
+            load_start = start - loop_pad
+            load_stop = stop + loop_pad
+            if self.multi_file_day:
+                # files from neighbouring days may extend into the range
+                load_start = load_start - pds.DateOffset(days=1)
+                load_stop = load_stop + pds.DateOffset(days=1)
+            load_start = pds.datetime(load_start.year, load_start.month,
+                                      load_start.day)
+            self.data, meta = self._load_data(date=load_start, stop=load_stop)
+            if not self.data.empty:
+                self.meta = meta
+                if not self.data.index.is_monotonic_increasing:
+                    self.data.sort_index(inplace=True)
+
+        elif (self.pad is not None) | self.multi_file_day:
             if self._next_data.empty & self._prev_data.empty:
                 # data has not already been loaded for previous and next days
                 # load data for all three
-                print('Initializing three day/file window')
+                logger.info('Initializing three day/file window')
                 # using current date or fid
                 self._prev_data, self._prev_meta = self._load_prev()
                 self._curr_data, self._curr_meta = \
@@ -663,22 +1184,24 @@ class Instrument(object):
                     self._next_data, self._next_meta = self._load_next()
 
             # make sure datetime indices for all data is monotonic
+            if self.profile_load:
+                tic = time.time()
             if not self._prev_data.index.is_monotonic_increasing:
                 self._prev_data.sort_index(inplace=True)
             if not self._curr_data.index.is_monotonic_increasing:
                 self._curr_data.sort_index(inplace=True)
             if not self._next_data.index.is_monotonic_increasing:
                 self._next_data.sort_index(inplace=True)
+            if self.profile_load:
+                tic = self._record_stage('sort', tic, self._curr_data)
                 
             # make tracking indexes consistent with new loads
             self._next_data_track = curr + inc
             self._prev_data_track = curr - inc
-            # attach data to object
+            # attach meta to object, data attached once padded below
             if not self._curr_data.empty:
-                self.data = self._curr_data.copy()
                 self.meta = self._curr_meta.copy()
-            else:
-                self.data = DataFrame(None)
+            # else:
                 # line below removed as it would delete previous meta, if any
                 # if you end a seasonal analysis with a day with no data, then
                 # no meta: self.meta = _meta.Meta()
@@ -705,27 +1228,17 @@ class Instrument(object):
                 raise ValueError("multi_file_day and loading by date are effectively equivalent."+ 
                                 "Can't have multi_file_day and load by file.")
             #print (first_pad, first_time, last_time, last_pad)
+            if self.profile_load:
+                tic = time.time()
 
             # pad data based upon passed parameter
-            if (not self._prev_data.empty) & (not self.data.empty):
-                padLeft = self._prev_data.loc[first_pad : self.data.index[0]]
-                if len(padLeft) > 0:
-                    if (padLeft.index[-1] == self.data.index[0]) :
-                        padLeft = padLeft.iloc[:-1, :]
-                    self.data = pds.concat([padLeft, self.data])
-
-            if (not self._next_data.empty) & (not self.data.empty):
-                padRight = self._next_data.loc[self.data.index[-1] : last_pad]
-                if len(padRight) > 0:
-                    if (padRight.index[0] == self.data.index[-1]) :
-                        padRight = padRight.iloc[1:, :]
-                    self.data = pds.concat([self.data, padRight])
-                    
-            self.data = self.data.ix[first_pad : last_pad]
-            # want exclusive end slicing behavior from above
-            if not self.empty:
-                if (self.data.index[-1] == last_pad) & (not want_last_pad):
-                    self.data = self.data.iloc[:-1, :]
+            self.data = self._assemble_pad_window(first_pad, last_pad,
+                                                  want_last_pad)
+            if self.mmap_dir is not None:
+                # the padded window is assembled in memory
+                self.data = self._memory_map(self.data)
+            if self.profile_load:
+                self._record_stage('pad', tic, self.data)
    
             ## drop any possible duplicate index times
             ##self.data.drop_duplicates(inplace=True)
@@ -750,26 +1263,66 @@ class Instrument(object):
             self.date = pds.datetime(temp.year, temp.month, temp.day)
             self.yr, self.doy = utils.getyrdoy(self.date)
 
+        if self.profile_load:
+            tic = time.time()
         if not self.data.empty:
             self._default_rtn(self)
+        if self.profile_load:
+            tic = self._record_stage('default', tic, self.data)
         # clean
         if (not self.data.empty) & (self.clean_level != 'none'):
             self._clean_rtn(self)   
+        if self.profile_load:
+            self._record_stage('clean', tic, self.data)
         # apply custom functions
         if not self.data.empty:
             self.custom._apply_all(self)
             
         # remove the excess padding, if any applied
-        if (self.pad is not None) & (not self.data.empty) & (not verifyPad):
-            self.data = self.data[first_time : last_time]
-            if (self.data.index[-1] == last_time) & (not want_last_pad):
-                self.data = self.data.iloc[:-1, :]
+        if self.profile_load:
+            tic = time.time()
+        if (stop is not None) and verifyPad:
+            # loaded days are trimmed to the range, keeping the padding
+            first_time = start - loop_pad
+            last_time = stop + loop_pad
+        if ((self.pad is not None) | (stop is not None)) & \
+                (not self.data.empty) & ((not verifyPad) | (stop is not None)):
+            # positional slice is a view, no copy of the day is made
+            istart = self.data.index.searchsorted(first_time, side='left')
+            side = 'right' if want_last_pad else 'left'
+            istop = self.data.index.searchsorted(last_time, side=side)
+            self.data = self.data.iloc[istart:istop]
+        # remove columns only needed during processing, orbits
+        # are determined after load so the orbit index stays
+        if (self.columns is not None) and (not self.data.empty):
+            keep = [col for col in self.data.columns 
+                    if (col in self.columns) or 
+                    (col == self.orbits.orbit_index)]
+            if len(keep) < len(self.data.columns):
+                self.data = self.data[keep]
+        if self.profile_load:
+            tic = self._record_stage('pad_trim', tic, self.data)
+
+        if (cache_path is not None) and (not self.data.empty):
+            _arrow_cache.write(cache_path, self.data, self.meta,
+                               self.cache_format)
+            if self.profile_load:
+                tic = self._record_stage('cache', tic, self.data)
 
         # transfer any extra attributes in meta to the Instrument object
         self.meta.transfer_attributes_to_instrument(self)
-        sys.stdout.flush()
+        if self.profile_load:
+            self._record_stage('meta_transfer', tic, self.data)
+            self._store_load_stats()
         return
 
+    def _store_load_stats(self):
+        """Assemble load_stats from stages recorded during load."""
+        self.load_stats = DataFrame(self._load_records, 
+                                    columns=['stage', 'time', 'rows', 'bytes'])
+        self.load_stats['date'] = self.date
+        self._load_history.append(self.load_stats)
+
     def download(self, start, stop, freq='D', user=None, password=None):
         """Download data for given Instrument object from start to stop.
         
@@ -842,6 +1395,11 @@ class Instrument(object):
         end :  datetime object, filename, or None (default)
                 end of iteration, inclusive. If None uses last data date.
                 list-like collection also accepted
+        step : string
+            optional third element, pandas frequency string giving the step
+            between dates (default='D'). Steps shorter than a day, such as
+            '1H' or '90min', are taken from the loaded day(s) spanned by 
+            each step without reloading. end is the start of the last step.
 
         Note
         ----
@@ -862,6 +1420,9 @@ class Instrument(object):
             stop2 = pysat.datetime(2010,2,14)
             inst.bounds = ([start, start2], [stop, stop2])
 
+            # iterate hourly through 2009-01-01
+            inst.bounds = (start, pysat.datetime(2009,1,1,23), '1H')
+
         """
         return self._iter_start, self._iter_stop
     
@@ -881,6 +1442,15 @@ class Instrument(object):
         else:
             # default do daily
             step = 'D'
+        self._iter_step = step
+        # processed days used to serve sub-daily iteration steps
+        self._window_days = collections.OrderedDict()
+        # iteration cursor and reverse map, rebuilt for the new bounds
+        self._iter_pos = None
+        self._iter_key = None
+        self._iter_map = None
+        self._iter_fids = None
+        self._iter_files = None
 
         if (start is None) and (end is None):
             # set default
@@ -961,16 +1531,182 @@ class Instrument(object):
 
         """
 
-        if self._iter_type == 'file':
-            for fname in self._iter_list:
-                self.load(fname=fname)
-                yield self       
- 
-        elif self._iter_type == 'date':
-            for date in self._iter_list:
-                self.load(date=date)
-                yield self            
+        for pos in range(len(self._iter_list)):
+            self._load_iter_entry(pos)
+            yield self
+
+    def _iter_current(self):
+        """Key of the loaded date or file id used by the iteration map."""
+        if self._iter_type == 'date':
+            return None if self.date is None else pds.Timestamp(self.date)
+        return self._fid
+
+    def _build_iter_map(self):
+        """Map each date or file id in the iteration list to its position."""
+        if self._iter_type == 'date':
+            keys = [pds.Timestamp(date) for date in self._iter_list]
+        else:
+            # file ids found with one lookup rather than one per step
+            self._iter_fids = pds.Index(self.files.files.values).get_indexer(
+                                                                self._iter_list)
+            keys = self._iter_fids
+        # Files.refresh attaches a new list, used to detect changes
+        self._iter_files = self.files.files
+        self._iter_map = dict((key, pos) for pos, key in enumerate(keys))
+
+    def _iter_position(self):
+        """Position of the loaded data within the iteration list.
+
+        The cursor left by the last iteration step is used if it still 
+        matches the loaded data, otherwise the reverse map is consulted.
+        None is returned if nothing is loaded or the data isn't within 
+        the iteration list.
+
+        """
+        self._check_iter_files()
+        current = self._iter_current()
+        if current is None:
+            return None
+        if (self._iter_pos is not None) and (self._iter_key == current):
+            return self._iter_pos
+        if self._iter_map is None:
+            self._build_iter_map()
+        return self._iter_map.get(current)
+
+    def _check_iter_files(self):
+        """Drop the cursor and reverse map if the file list has changed
+        since they were built, as file ids may now refer to other files."""
+        if (self._iter_map is not None) and \
+                (self._iter_files is not self.files.files):
+            self._iter_pos = None
+            self._iter_key = None
+            self._iter_map = None
+            self._iter_fids = None
+            self._iter_files = None
+
+    def _load_iter_entry(self, pos, verifyPad=False):
+        """Load the date or file at pos in the iteration list."""
+        if self._iter_type == 'date':
+            self._load_iter_date(self._iter_list[pos], verifyPad=verifyPad)
+        else:
+            self._check_iter_files()
+            if self._iter_fids is None:
+                self._build_iter_map()
+            fid = int(self._iter_fids[pos])
+            if fid < 0:
+                raise ValueError(' '.join(('Could not find',
+                                           str(self._iter_list[pos]),
+                                           'in available file list.')))
+            self.load(fid=fid, verifyPad=verifyPad)
+        self._iter_pos = pos
+        self._iter_key = self._iter_current()
+
+    def _iter_sub_daily(self):
+        """True if iterating by date with steps shorter than a day."""
+        if (self._iter_type != 'date') or (len(self._iter_list) == 0):
+            return False
+        start = pds.Timestamp(self._iter_list[0])
+        offset = pds.tseries.frequencies.to_offset(self._iter_step)
+        return (start + offset) - start < pds.Timedelta(days=1)
+
+    def _load_iter_date(self, date, verifyPad=False):
+        """Load the iteration step beginning at date.
+        
+        Whole days are loaded for daily or longer steps. Shorter steps are 
+        served from the processed days spanned by the step, which are kept
+        until a later step no longer needs them.
+        
+        """
+        if not self._iter_sub_daily():
+            self.load(date=date, verifyPad=verifyPad)
+            return
+
+        start = pds.Timestamp(date)
+        stop = start + pds.tseries.frequencies.to_offset(self._iter_step)
+        days = list(pds.date_range(start.normalize(), 
+                                   (stop - pds.Timedelta(1)).normalize(),
+                                   freq='D'))
+        # forget days outside of this step
+        for day in list(self._window_days.keys()):
+            if day not in days:
+                del self._window_days[day]
+        frames = []
+        for day in days:
+            if day not in self._window_days:
+                self.load(date=day, verifyPad=verifyPad)
+                self._window_days[day] = (self.data, self.meta)
+            data = self._window_days[day][0]
+            # positional slices are views of the loaded day
+            frames.append(data.iloc[data.index.searchsorted(start):
+                                    data.index.searchsorted(stop)])
+        self.data = frames[0] if len(frames) == 1 else pds.concat(frames)
+        self.meta = self._window_days[days[-1]][1]
+        self.date = start
+        self.yr, self.doy = utils.getyrdoy(self.date)
+        self.orbits._reset()
+                
+    def iter_window(self, width, step=1):
+        """Iterate over a window of consecutive days or files.
+        
+        Parameters
+        ----------
+        width : int
+            number of days (files) in each window
+        step : int
+            number of days (files) the window moves each iteration
+            (default=1)
+            
+        Note
+        ----
+        Limits of iteration, and iteration type (date/file) set by `bounds`
+        attribute. Each day (file) is loaded and processed by load. Days
+        shared with the previous window are kept in a ring buffer so each 
+        iteration only loads the step new days. The window is exposed
+        as a contiguous self.data. For date iteration, date, yr, and doy
+        are set to the first day in the window.
+        
+        Examples
+        --------
+        ::
+        
+            inst.bounds = (start, stop)
+            # 27 day solar rotation, moving one day at a time
+            for inst in inst.iter_window(27):
+                print('Window starting', inst.date, len(inst.data))
                 
+        """
+        if (width < 1) or (step < 1):
+            raise ValueError('width and step must be at least 1.')
+        # (entry, data, meta) for each day/file in current window
+        buffer = collections.deque(maxlen=width)
+        for i in range(0, len(self._iter_list) - width + 1, step):
+            entries = list(self._iter_list[i:i+width])
+            # drop days that have left the window
+            while (len(buffer) > 0) and (buffer[0][0] not in entries):
+                buffer.popleft()
+            # load days entering the window
+            for entry in entries[len(buffer):]:
+                if self._iter_type == 'file':
+                    self.load(fname=entry)
+                else:
+                    self.load(date=entry)
+                buffer.append((entry, self.data, self.meta))
+
+            frames = [item[1] for item in buffer if not item[1].empty]
+            if len(frames) > 1:
+                self.data = pds.concat(frames)
+            elif len(frames) == 1:
+                # changes to self.data shouldn't alter the buffer
+                self.data = frames[0].copy()
+            else:
+                self.data = DataFrame(None)
+            self.meta = buffer[-1][2]
+            if self._iter_type == 'date':
+                self.date = entries[0]
+                self.yr, self.doy = utils.getyrdoy(self.date)
+            self.orbits._reset()
+            yield self
+
     def next(self, verifyPad=False):
         """Manually iterate through the data loaded in Instrument object.
         
@@ -984,27 +1720,14 @@ class Instrument(object):
          
         """
         
-        if self._iter_type == 'date':
-            if self.date is not None:
-                idx, = np.where(self._iter_list == self.date)
-                if (len(idx) == 0) | (idx+1 >= len(self._iter_list)):
-                    raise StopIteration('Outside the set date boundaries.')
-                else:
-                    idx += 1
-                    self.load(date=self._iter_list[idx[0]], verifyPad=verifyPad)
-            else:
-                self.load(date=self._iter_list[0], verifyPad=verifyPad)
-
-        elif self._iter_type == 'file':
-            if self._fid is not None:
-                first = self.files.get_index(self._iter_list[0])
-                last = self.files.get_index(self._iter_list[-1])
-                if (self._fid < first) | (self._fid+1 > last):
-                    raise StopIteration('Outside the set file boundaries.')
-                else:
-                    self.load(fname=self._iter_list[self._fid+1-first], verifyPad=verifyPad)
-            else:
-                self.load(fname=self._iter_list[0], verifyPad=verifyPad)
+        if self._iter_current() is not None:
+            pos = self._iter_position()
+            if (pos is None) or (pos+1 >= len(self._iter_list)):
+                raise StopIteration('Outside the set {:s} boundaries.'.format(
+                                                            self._iter_type))
+            self._load_iter_entry(pos+1, verifyPad=verifyPad)
+        else:
+            self._load_iter_entry(0, verifyPad=verifyPad)
 
     def prev(self, verifyPad=False):
         """Manually iterate backwards through the data in Instrument object.
@@ -1019,27 +1742,14 @@ class Instrument(object):
             
         """
         
-        if self._iter_type == 'date':
-            if self.date is not None:
-                idx, = np.where(self._iter_list == self.date)
-                if (len(idx) == 0) | (idx-1 < 0):
-                    raise StopIteration('Outside the set date boundaries.')
-                else:
-                    idx -= 1
-                    self.load(date=self._iter_list[idx[0]], verifyPad=verifyPad)
-            else:
-                self.load(date=self._iter_list[-1], verifyPad=verifyPad)
-
-        elif self._iter_type == 'file':
-            if self._fid is not None:
-                first = self.files.get_index(self._iter_list[0])
-                last = self.files.get_index(self._iter_list[-1])
-                if (self._fid-1 < first) | (self._fid > last):
-                    raise StopIteration('Outside the set file boundaries.')
-                else:
-                    self.load(fname=self._iter_list[self._fid-1-first], verifyPad=verifyPad)
-            else:
-                self.load(fname=self._iter_list[-1], verifyPad=verifyPad)
+        if self._iter_current() is not None:
+            pos = self._iter_position()
+            if (pos is None) or (pos-1 < 0):
+                raise StopIteration('Outside the set {:s} boundaries.'.format(
+                                                            self._iter_type))
+            self._load_iter_entry(pos-1, verifyPad=verifyPad)
+        else:
+            self._load_iter_entry(len(self._iter_list)-1, verifyPad=verifyPad)
 
 
     def _get_data_info(self, data, format):
@@ -1058,6 +1768,10 @@ class Instrument(object):
         """
         # get type of data
         data_type = data.dtype
+        if getattr(data_type, 'name', '') == 'category':
+            # categoricals are written using their values
+            data = data.astype(np.dtype('O'))
+            data_type = data.dtype
         # check if older format
         # if format[:7] == 'NETCDF3':
         if format != 'NETCDF4':
@@ -1083,20 +1797,218 @@ class Instrument(object):
                 datetime_flag = False
         else:
             # dealing with a more complicated object
-            # iterate over elements until we hit something that is something, and not NaN
-            data_type = type(data.iloc[0])
-            for i in np.arange(len(data)):
-                if len(data.iloc[i]) > 0:
-                    data_type = type(data.iloc[i])
-                    if not isinstance(data_type, np.float):
-                        break
+            # check the whole column for strings at once
+            try:
+                infer_dtype = pds.api.types.infer_dtype
+            except AttributeError:
+                # pandas.api.types added in 0.19.0
+                infer_dtype = pds.lib.infer_dtype
+            try:
+                inferred = infer_dtype(data, skipna=True)
+            except TypeError:
+                # older pandas, no skipna keyword
+                inferred = infer_dtype(data.dropna())
+            if inferred == 'string':
+                data_type = type(' ')
+            elif inferred == 'unicode':
+                data_type = type(u' ')
+            else:
+                # iterate over elements until we hit something that is something, and not NaN
+                data_type = type(data.iloc[0])
+                for i in np.arange(len(data)):
+                    if len(data.iloc[i]) > 0:
+                        data_type = type(data.iloc[i])
+                        if not isinstance(data_type, np.float):
+                            break
             datetime_flag = False
             
                 
         
         return data, data_type, datetime_flag
 
-    def to_netcdf4(self, fname=None, format=None, base_instrument=None):
+    @staticmethod
+    def _netcdf4_string_variable(out_data, key, values, encoding):
+        """Write 1D strings as categorical codes or fixed width characters.
+        
+        Parameters
+        ----------
+        out_data : netCDF4.Dataset
+            open output file
+        key : string
+            variable name
+        values : numpy.ndarray
+            object array of strings, possibly with missing values
+        encoding : string
+            'categorical' writes integer codes along epoch, -1 for missing,
+            and the unique strings in variable key_categories, named by the
+            pysat_categories attribute. 'char' writes a character array
+            along epoch and key_strlen.
+        
+        Returns
+        -------
+        netCDF4.Variable
+            variable holding the codes or characters, for attaching metadata
+            
+        """
+        import netCDF4
+
+        def to_chars(strings, dim_name):
+            # utf-8 bytes, one per character of fixed width array
+            encoded = np.char.encode(np.asarray(strings, dtype='U'), 'utf-8')
+            width = max(encoded.dtype.itemsize, 1)
+            out_data.createDimension(dim_name, width)
+            return netCDF4.stringtochar(encoded.astype('S{:d}'.format(width)))
+
+        if encoding == 'categorical':
+            # codes and unique values found once using hashing
+            codes, categories = pds.factorize(values)
+            num_cat = max(len(categories), 1)
+            code_type = 'i1' if num_cat < 128 else 'i2' if num_cat < 32768 else 'i4'
+            cat_name = key + '_categories'
+            out_data.createDimension(cat_name, num_cat)
+            chars = to_chars(categories if len(categories) > 0 else [''],
+                             cat_name + '_strlen')
+            cdfkey = out_data.createVariable(cat_name, 'S1',
+                                             dimensions=(cat_name,
+                                                         cat_name + '_strlen'))
+            cdfkey[:] = chars
+            cdfkey = out_data.createVariable(key, code_type, dimensions=('epoch',))
+            cdfkey[:] = codes.astype(code_type)
+            cdfkey.pysat_categories = cat_name
+        else:
+            filled = np.where(pds.isnull(values), '', values)
+            chars = to_chars(filled, key + '_strlen')
+            cdfkey = out_data.createVariable(key, 'S1',
+                                             dimensions=('epoch', key + '_strlen'))
+            cdfkey[:] = chars
+        return cdfkey
+
+    @staticmethod
+    def _netcdf4_encode_times(values, format):
+        """Convert datetime64[ns] values into times stored in netCDF files.
+        
+        Parameters
+        ----------
+        values : numpy.ndarray
+            datetime64[ns] values
+        format : string
+            netCDF format
+        
+        Returns
+        -------
+        numpy.ndarray
+            int64 microseconds since 1970 for NETCDF4, float milliseconds 
+            for other formats, which lack 64-bit integers. NaT is kept as
+            the smallest int64, or NaN.
+            
+        """
+        # view as integer nanoseconds, only copied if not already ns
+        values = np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+        nat = values == np.iinfo(np.int64).min
+        if format == 'NETCDF4':
+            # integer division is exact, floating point multiplication isn't
+            out = values // 1000
+            if nat.any():
+                out[nat] = np.iinfo(np.int64).min
+        else:
+            out = values / 1.E6
+            if nat.any():
+                out[nat] = np.nan
+        return out
+
+    @staticmethod
+    def _stack_profiles(values, lengths, max_len):
+        """Arrange concatenated profile values into a 2D array for writing.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            values from all profiles, concatenated in time order
+        lengths : numpy.ndarray
+            number of samples in each profile
+        max_len : int
+            number of samples in the longest profile
+
+        Returns
+        -------
+        numpy.ndarray or numpy.ma.MaskedArray
+            values shaped (number of profiles, max_len). Shorter profiles
+            are padded with masked values, or empty strings for text.
+        """
+        num = len(lengths)
+        if (lengths == max_len).all():
+            return values.reshape((num, max_len))
+
+        if values.dtype.kind in ['O', 'U', 'S']:
+            out = np.empty((num, max_len), dtype=values.dtype)
+            out[:] = ''
+        else:
+            out = np.ma.masked_all((num, max_len), dtype=values.dtype)
+        # location of each value within padded array
+        rows = np.repeat(np.arange(num), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        cols = np.arange(len(values)) - np.repeat(offsets, lengths)
+        out[rows, cols] = values
+        return out
+
+    def _netcdf4_chunk_length(self):
+        """Number of samples along epoch covering roughly an hour of data.
+        
+        Chunks of this length keep reads of a time range from decompressing
+        much more data than was asked for.
+        
+        """
+        num = len(self.data.index)
+        if num < 2:
+            return max(num, 1)
+        span = (self.data.index[-1] - self.data.index[0]).total_seconds()
+        if span <= 0:
+            return num
+        per_hour = int(np.ceil(3600.*(num - 1)/span))
+        return int(min(max(per_hour, 1), num))
+
+    def _netcdf4_var_kwargs(self, name, coltype, dims, format, zlib, complevel,
+                            shuffle, chunksizes, least_significant_digit):
+        """Storage keywords passed to netCDF4 createVariable for a variable.
+        
+        Compression and chunking are only applied to numeric variables
+        in NETCDF4 and NETCDF4_CLASSIC files.
+        
+        """
+        kwargs = {}
+        if not format.startswith('NETCDF4'):
+            return kwargs
+        if (coltype == type(' ')) or (coltype == type(u' ')):
+            return kwargs
+        if zlib:
+            kwargs['zlib'] = True
+            kwargs['complevel'] = complevel
+            kwargs['shuffle'] = shuffle
+        if (chunksizes is not None) or zlib:
+            if chunksizes is None:
+                chunksizes = self._netcdf4_chunk_length()
+            if isinstance(chunksizes, dict):
+                chunk = chunksizes.get(name, self._netcdf4_chunk_length())
+            else:
+                chunk = chunksizes
+            if np.ndim(chunk) == 0:
+                # epoch chunk length, keep whole profiles in each chunk
+                chunk = [chunk] + list(dims[1:])
+            chunk = [int(min(max(item, 1), max(dim, 1))) 
+                     for item, dim in zip(chunk, dims)]
+            kwargs['chunksizes'] = chunk
+        if least_significant_digit is not None:
+            if isinstance(least_significant_digit, dict):
+                digit = least_significant_digit.get(name, None)
+            else:
+                digit = least_significant_digit
+            if (digit is not None) and (np.dtype(coltype).kind == 'f'):
+                kwargs['least_significant_digit'] = digit
+        return kwargs
+
+    def to_netcdf4(self, fname=None, format=None, base_instrument=None,
+                   zlib=False, complevel=4, shuffle=True, chunksizes=None,
+                   least_significant_digit=None, string_encoding='vlen'):
         """Stores loaded data into a netCDF3/4 file.
         
         Parameters
@@ -1109,10 +2021,35 @@ class Instrument(object):
         base_instrument : pysat.Instrument
             used as a comparison, only attributes that are present with
             self and not on base_instrument are written to netCDF
+        zlib : boolean
+            if True, numeric variables are compressed (default=False)
+        complevel : int
+            zlib compression level, 1 (fastest) to 9 (smallest) (default=4)
+        shuffle : boolean
+            if True, the HDF5 shuffle filter is applied before compression,
+            which usually improves compression of numeric data (default=True)
+        chunksizes : int, list, dict, or NoneType
+            chunk shape for numeric variables. An int sets the chunk length
+            along epoch (profiles are kept whole), a list sets the full shape,
+            and a dict maps variable names to either. None uses chunks
+            holding about an hour of data when zlib is True, and contiguous
+            storage otherwise. (default=None)
+        least_significant_digit : int, dict, or NoneType
+            power of ten of the smallest decimal place retained in floating 
+            point variables, improving compression at the cost of precision.
+            A dict maps variable names to digits. (default=None)
+        string_encoding : string
+            storage of 1D string columns. 'categorical' stores integer codes
+            along epoch plus a lookup table of unique values, 'char' stores
+            fixed-width character arrays, and 'vlen' stores variable length
+            strings (NETCDF4 only). Missing values are lost with 'char'.
+            (default='vlen')
         
         Note
         ----
-        Not all features supported by netCDF3 formats.
+        Not all features supported by netCDF3 formats. Compression and
+        chunking require NETCDF4 or NETCDF4_CLASSIC formats and are ignored
+        for string variables.
 
         Stores 1-D data along dimension 'epoch' - the date time index.
         
@@ -1122,6 +2059,7 @@ class Instrument(object):
            dimensions within netCDF, key_2, key_3; first dimension time
          - The index organizing the data stored as key_sample_index
          - from_netcdf3 uses this naming scheme to reconstruct data structure
+         - Profiles of different lengths are padded to the longest profile
             
         The datetime index is stored as 'UNIX time'. netCDF-3 doesn't support
         64-bit integers so it is stored as a 64-bit float. This results in a
@@ -1133,12 +2071,13 @@ class Instrument(object):
         """
         
         import netCDF4
-        import pysat
 
         if format is None:
             format = 'NETCDF4'
         else:
             format = format.upper()
+        if string_encoding not in ['categorical', 'char', 'vlen']:
+            raise ValueError("string_encoding must be 'categorical', 'char', or 'vlen'")
 
         base_instrument = Instrument() if base_instrument is None else base_instrument
         with netCDF4.Dataset(fname, mode='w', format=format) as out_data:
@@ -1147,15 +2086,22 @@ class Instrument(object):
             out_data.createDimension('epoch', num)
             
             # write out the datetime index
+            var_kwargs = self._netcdf4_var_kwargs('epoch', np.int64, [num],
+                                                  format, zlib, complevel,
+                                                  shuffle, chunksizes, None)
             if format == 'NETCDF4':
-                cdfkey = out_data.createVariable('epoch', 'i8', dimensions=('epoch'),)
+                cdfkey = out_data.createVariable('epoch', 'i8', dimensions=('epoch'),
+                                                 **var_kwargs)
                 cdfkey.units = 'Microseconds since 1970-1-1 00:00:00'
-                cdfkey[:] = (self.data.index.values.astype(np.int64)*1E-3).astype(np.int64)
+                cdfkey[:] = self._netcdf4_encode_times(self.data.index.values,
+                                                       format)
             else:
                 # can't store full time resolution
-                cdfkey = out_data.createVariable('epoch', 'f8', dimensions=('epoch'),)
+                cdfkey = out_data.createVariable('epoch', 'f8', dimensions=('epoch'),
+                                                 **var_kwargs)
                 cdfkey.units = 'Milliseconds since 1970-1-1 00:00:00'
-                cdfkey[:] = (self.data.index.values.astype(int)*1.E-6).astype(np.float)
+                cdfkey[:] = self._netcdf4_encode_times(self.data.index.values,
+                                                       format)
     
             cdfkey.long_name = 'UNIX time'
             cdfkey.calendar = 'standard'
@@ -1165,12 +2111,17 @@ class Instrument(object):
                 # get information on data
                 data, coltype, datetime_flag = self._get_data_info(self[key], format)
 
-                if self[key].dtype != np.dtype('O'):
+                if data.dtype != np.dtype('O'):
                     # not an object, normal basic data
-                    # print(key, coltype, format)
+                    var_kwargs = self._netcdf4_var_kwargs(key, coltype, [num],
+                                                          format, zlib,
+                                                          complevel, shuffle,
+                                                          chunksizes,
+                                                          least_significant_digit)
                     cdfkey = out_data.createVariable(key,
                                                      coltype,
-                                                     dimensions=('epoch'), )
+                                                     dimensions=('epoch'),
+                                                     **var_kwargs)
                     # attach any meta data
                     try:
                         new_dict = self.meta[key].to_dict()
@@ -1183,19 +2134,33 @@ class Instrument(object):
                         # really attach metadata now
                         cdfkey.setncatts(new_dict)
                     except:
-                        print(', '.join(('Unable to find MetaData for', key)))
+                        logger.warning('Unable to find MetaData for %s', key)
                     # assign data
                     if datetime_flag:
-                        if format == 'NETCDF4':
-                            cdfkey[:] = (data * 1.E-3).astype(coltype)
-                        else:
-                            cdfkey[:] = (data * 1.E-6).astype(coltype)
+                        cdfkey[:] = self._netcdf4_encode_times(data.values,
+                                                               format)
                     else:
                         cdfkey[:] = data.values
                 else:
                     # it is an object
                     # use info in coltype to get real datatype
-                    if (coltype == type(' ')) or (coltype == type(u' ')):
+                    if ((coltype == type(' ')) or (coltype == type(u' '))) \
+                            and (string_encoding != 'vlen'):
+                        # strings stored as codes or fixed width characters
+                        cdfkey = self._netcdf4_string_variable(out_data, key,
+                                                               data.values,
+                                                               string_encoding)
+                        try:
+                            new_dict = self.meta[key].to_dict()
+                            # no FillValue allowed
+                            for label in [u'_FillValue', u'FillVal']:
+                                if label in new_dict.keys():
+                                    new_dict.pop(label)
+                            cdfkey.setncatts(new_dict)
+                        except:
+                            logger.warning('Unable to find MetaData for %s', key)
+
+                    elif (coltype == type(' ')) or (coltype == type(u' ')):
                         # dealing with a string
                         cdfkey = out_data.createVariable(key,
                                                          coltype,
@@ -1215,111 +2180,144 @@ class Instrument(object):
                             # really attach metadata now
                             cdfkey.setncatts(new_dict)
                         except:
-                            print(', '.join(('Unable to find MetaData for', key)) )
+                            logger.warning('Unable to find MetaData for %s', key)
                         cdfkey[:] = data.values
 
                     else:
                         # we are dealing with a more complicated object
                         # presuming a series with a dataframe in each location
-                        dims = np.shape(self[key].iloc[0])
-                        obj_dim_names = []
-
-                        for i, dim in enumerate(dims[:-1]):
-                            # don't need to go over last dimension value,
-                            # it covers number of columns
-                            obj_dim_names.append(key+'_dimension_%i' % (i+1))
-                            out_data.createDimension(obj_dim_names[-1], dim)
-                        # total dimensions stored for object are epoch plus ones just above
-                        var_dim = tuple(['epoch']+obj_dim_names)
-                        # iterate over columns and store
+                        profiles = self[key]
+                        lengths = np.array([len(item) for item in profiles])
+                        # a zero length dimension would be unlimited
+                        max_len = max(lengths.max(), 1)
+                        # use the longest profile to determine types
+                        data_loc = lengths.argmax()
+                        # profiles stored along epoch and one extra dimension
+                        # shorter profiles are padded to the longest one
+                        obj_dim_name = key + '_dimension_1'
+                        out_data.createDimension(obj_dim_name, max_len)
+                        var_dim = ('epoch', obj_dim_name)
+                        # length of each profile, so padding is trimmed
+                        # when loaded
+                        cdfkey = out_data.createVariable(obj_dim_name + '_length',
+                                                         'i4',
+                                                         dimensions=('epoch',))
+                        cdfkey.pysat_profile_lengths = obj_dim_name
+                        cdfkey[:] = lengths.astype('i4')
+                        # combine all of the profiles so each variable
+                        # may be written with a single call
+                        stacked = pds.concat(profiles.tolist())
                         try:
-                            iterable = self[key].iloc[0].columns
+                            iterable = profiles.iloc[data_loc].columns
                             is_frame = True
                         except AttributeError:
                             # looking at a series, which doesn't have columns
-                            iterable = self[key].iloc[0].name
+                            iterable = [profiles.iloc[data_loc].name]
                             is_frame = False
 
-                        # find location that has data
-                        data_loc = 0
-                        for jjj in np.arange(len(self.data)):
-                            if len(self.data[key].iloc[0]) > 0:
-                                data_loc = jjj
-                                break
-
                         for col in iterable:
                             if is_frame:
-                                data, coltype, _ = self._get_data_info(self[key].iloc[data_loc][col], format)
+                                data, coltype, _ = self._get_data_info(profiles.iloc[data_loc][col], format)
+                                values = stacked[col].values
                             else:
-                                data, coltype, _ = self._get_data_info(self[key].iloc[data_loc], format)
-                            cdfkey = out_data.createVariable(key + '_' + col,
+                                data, coltype, _ = self._get_data_info(profiles.iloc[data_loc], format)
+                                values = stacked.values
+                            name = key + '_' + col
+                            var_kwargs = self._netcdf4_var_kwargs(name, coltype,
+                                                                  [num, max_len],
+                                                                  format, zlib,
+                                                                  complevel,
+                                                                  shuffle,
+                                                                  chunksizes,
+                                                                  least_significant_digit)
+                            cdfkey = out_data.createVariable(name,
                                                              coltype,
-                                                             dimensions=var_dim)
-
-                            if is_frame:
-                                # attach any meta data
-                                try:
+                                                             dimensions=var_dim,
+                                                             **var_kwargs)
+                            # attach any meta data
+                            try:
+                                if is_frame:
                                     cdfkey.setncatts(self.meta[key][col].to_dict())
-                                except:
-                                    print(', '.join(('Unable to find MetaData for',key,col)) )
-                                # attach data
-                                for i in range(num):
-                                    cdfkey[i, :] = self[key].iloc[i][col].values.astype(coltype)
-                            else:
-                                # attach any meta data
-                                cdfkey.setncatts(self.meta[key].to_dict())
-                                # attach data
-                                for i in range(num):
-                                    cdfkey[i, :] = self[key].iloc[i].values.astype(coltype)
+                                else:
+                                    cdfkey.setncatts(self.meta[key].to_dict())
+                            except:
+                                logger.warning('Unable to find MetaData for %s %s', key, col)
+                            # attach data
+                            cdfkey[:, :] = self._stack_profiles(values.astype(coltype),
+                                                                lengths, max_len)
 
                         # store the dataframe index for each time of main dataframe
-                        data, coltype, datetime_flag = self._get_data_info(self[key].iloc[data_loc].index, format)
-                        cdfkey = out_data.createVariable(key+'_dimension_1',
-                                                         coltype, dimensions=var_dim)
+                        data, coltype, datetime_flag = self._get_data_info(profiles.iloc[data_loc].index, format)
+                        # index values are never quantized
+                        var_kwargs = self._netcdf4_var_kwargs(obj_dim_name,
+                                                              coltype,
+                                                              [num, max_len],
+                                                              format, zlib,
+                                                              complevel, shuffle,
+                                                              chunksizes, None)
+                        cdfkey = out_data.createVariable(obj_dim_name,
+                                                         coltype, 
+                                                         dimensions=var_dim,
+                                                         **var_kwargs)
                         if datetime_flag:
-                            #print('datetime flag')
                             if format == 'NETCDF4':
                                 cdfkey.units = 'Microseconds since 1970-1-1 00:00:00'
-                                for i in range(num):
-                                    cdfkey[i, :] = (self[key].iloc[i].index.values.astype(coltype)*1.E-3).astype(coltype)
                             else:
                                 cdfkey.units = 'Milliseconds since 1970-1-1 00:00:00'
-                                for i in range(num):
-                                    cdfkey[i, :] = (self[key].iloc[i].index.values.astype(coltype)*1.E-6).astype(coltype)
-
+                            values = self._netcdf4_encode_times(stacked.index.values,
+                                                                format)
                             cdfkey.long_name = 'UNIX time'
                         else:
                             #cdfkey.units = ''
-                            if self[key].iloc[data_loc].index.name is not None:
-                                cdfkey.long_name = self[key].iloc[data_loc].index.name
+                            if profiles.iloc[data_loc].index.name is not None:
+                                cdfkey.long_name = profiles.iloc[data_loc].index.name
                             else:
                                 cdfkey.long_name = key
-                            for i in range(num):
-                                cdfkey[i, :] = self[key].iloc[i].index.to_native_types()
+                            values = stacked.index.values.astype(coltype)
+                        cdfkey[:, :] = self._stack_profiles(values, lengths, 
+                                                            max_len)
 
             # store any non standard attributes
-            base_attrb = dir(base_instrument)
-            this_attrb = dir(self)
-            
-            adict = {}
-            for key in this_attrb:
-                if key not in base_attrb:
-                    if key[0] != '_':
-                        adict[key] = self.__getattribute__(key)
-            # store any non-standard attributes attached to meta
-            base_attrb = dir(base_instrument.meta)
-            this_attrb = dir(self.meta)
-            for key in this_attrb:
-                if key not in base_attrb:
-                    if key[0] != '_':
-                        adict[key] = self.meta.__getattribute__(key)
-            adict['pysat_version'] = pysat.__version__
-            adict['Conventions'] = 'CF-1.6'
-
-            # check for binary types
-            for key in adict.keys():
-                if isinstance(adict[key], bool):
-                    adict[key] = int(adict[key])
-
-            out_data.setncatts(adict)
+            out_data.setncatts(self._netcdf4_global_attrs(base_instrument))
         return
+
+    def _netcdf4_global_attrs(self, base_instrument):
+        """Attributes on self and self.meta not present on base_instrument.
+        
+        Parameters
+        ----------
+        base_instrument : pysat.Instrument
+            used as a comparison, only attributes that are present with
+            self and not on base_instrument are returned
+        
+        Returns
+        -------
+        dict
+            netCDF global attributes
+            
+        """
+        import pysat
+
+        base_attrb = dir(base_instrument)
+        this_attrb = dir(self)
+        
+        adict = {}
+        for key in this_attrb:
+            if key not in base_attrb:
+                if key[0] != '_':
+                    adict[key] = self.__getattribute__(key)
+        # store any non-standard attributes attached to meta
+        base_attrb = dir(base_instrument.meta)
+        this_attrb = dir(self.meta)
+        for key in this_attrb:
+            if key not in base_attrb:
+                if key[0] != '_':
+                    adict[key] = self.meta.__getattribute__(key)
+        adict['pysat_version'] = pysat.__version__
+        adict['Conventions'] = 'CF-1.6'
+
+        # check for binary types
+        for key in adict.keys():
+            if isinstance(adict[key], bool):
+                adict[key] = int(adict[key])
+        return adict
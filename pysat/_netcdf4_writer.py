@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import logging
+import numpy as np
+import pandas as pds
+
+logger = logging.getLogger('pysat.netcdf4_writer')
+
+
+class NetCDF4Writer(object):
+    """Stream Instrument data into netCDF4 files along an unlimited epoch.
+
+    Parameters
+    ----------
+    fname : string
+        full path of the output file. When files are rolled, fname is
+        formatted with the time of the first sample in each file (year,
+        month, day, hour, minute, second, doy) and the file number (num),
+        e.g. 'out_{year:04d}{month:02d}{day:02d}_{num:03d}.nc'. Rolling by
+        max_bytes, or when profiles outgrow a file, requires the num field.
+        Names repeated within a writer raise a ValueError rather than
+        overwrite a file already written.
+    format : string
+        format keyword passed to netCDF4 routine, NETCDF4 (default) or
+        NETCDF4_CLASSIC. netCDF3 formats support only one unlimited
+        dimension and are not recommended.
+    max_bytes : int or NoneType
+        start a new file once the current one reaches this size. Checked
+        after each write. (default=None)
+    period : pandas.DateOffset, dict, or NoneType
+        start a new file once data passes the first time in the current file
+        plus period. Dictionary, if supplied, is passed to pandas DateOffset.
+        (default=None)
+    max_profile_length : int or NoneType
+        minimum number of samples in the profile dimension of each file.
+        Profiles are padded to this length, avoiding new files when later
+        profiles are longer than the first ones. (default=None)
+    base_instrument : pysat.Instrument
+        used as a comparison, only attributes that are present with
+        the written Instrument and not on base_instrument are written
+    **kwargs :
+        zlib, complevel, shuffle, chunksizes, and least_significant_digit
+        are used as in Instrument.to_netcdf4. Chunks along epoch default to
+        about an hour of data, as chunked storage is required along an
+        unlimited dimension.
+
+    Attributes
+    ----------
+    files : list of strings
+        names of all files written to so far
+
+    Note
+    ----
+    Variables are created the first time they are seen within a file.
+    Profiles are stored as in Instrument.to_netcdf4, along with the length
+    of each profile. The profile dimension is sized by the first profiles 
+    written to each file, or max_profile_length if larger. Data with longer
+    profiles starts a new file, which requires the num field in fname.
+
+    Global attributes are taken from the first Instrument written to
+    each file.
+
+    Examples
+    --------
+    ::
+
+        ivm = pysat.Instrument('cnofs', 'ivm')
+        ivm.bounds = (start, stop)
+        with pysat.NetCDF4Writer('ivm_{year:04d}{month:02d}.nc',
+                                 period={'months': 1}, zlib=True) as writer:
+            for inst in ivm:
+                writer.write(inst)
+
+    """
+
+    def __init__(self, fname, format=None, max_bytes=None, period=None,
+                 max_profile_length=None, base_instrument=None, zlib=False,
+                 complevel=4, shuffle=True, chunksizes=None,
+                 least_significant_digit=None):
+
+        self.fname = fname
+        self.format = 'NETCDF4' if format is None else format.upper()
+        self.max_bytes = max_bytes
+        if isinstance(period, dict):
+            period = pds.DateOffset(**period)
+        elif (period is not None) and not isinstance(period, pds.DateOffset):
+            raise ValueError('period must be a dictionary or a pandas.DateOffset instance.')
+        self.period = period
+        if ((self.max_bytes is not None) or (self.period is not None)) and \
+                (fname.find('{') < 0):
+            raise ValueError('fname must contain format fields to roll files.')
+        if (self.max_bytes is not None) and (fname.find('{num') < 0):
+            raise ValueError('fname must contain a num field to roll by size.')
+        self.max_profile_length = max_profile_length
+        self.base_instrument = base_instrument
+        self.zlib = zlib
+        self.complevel = complevel
+        self.shuffle = shuffle
+        self.chunksizes = chunksizes
+        self.least_significant_digit = least_significant_digit
+
+        self.files = []
+        # currently open netCDF4 Dataset and the end of its time period
+        self._file = None
+        self._period_end = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, inst):
+        """Append the data loaded in inst to the output file(s).
+
+        Parameters
+        ----------
+        inst : pysat.Instrument
+            Instrument with loaded data
+
+        """
+        data = inst.data
+        while len(data) > 0:
+            if self._file is None:
+                self._open(inst, data.index[0])
+            if self._period_end is not None:
+                num = data.index.searchsorted(self._period_end, side='left')
+                if num == 0:
+                    # data starts in a later period
+                    self.close()
+                    continue
+                chunk, data = data.iloc[:num], data.iloc[num:]
+            else:
+                chunk, data = data, data.iloc[0:0]
+            if self._profiles_outgrow(chunk):
+                # profile dimensions are fixed once created
+                if self.fname.find('{num') < 0:
+                    estr = ''.join(('Profiles longer than those already in ',
+                                    self.files[-1], ', use max_profile_length',
+                                    ' or a num field in fname.'))
+                    raise ValueError(estr)
+                self.close()
+                self._open(inst, chunk.index[0])
+            self._append(inst, chunk)
+            if len(data) > 0:
+                self.close()
+
+        if (self.max_bytes is not None) and (self._file is not None):
+            self._file.sync()
+            if os.path.getsize(self.files[-1]) >= self.max_bytes:
+                self.close()
+        return
+
+    def close(self):
+        """Close the current output file, if any. Later writes start a new
+        file."""
+        if self._file is not None:
+            self._file.close()
+            logger.info('Closed %s', self.files[-1])
+        self._file = None
+        self._period_end = None
+
+    def _open(self, inst, start):
+        """Create a new output file beginning with data at time start."""
+        import netCDF4
+
+        fname = self.fname.format(year=start.year, month=start.month,
+                                  day=start.day, hour=start.hour,
+                                  minute=start.minute, second=start.second,
+                                  doy=start.dayofyear, num=len(self.files))
+        if fname in self.files:
+            # mode 'w' would overwrite data already written
+            estr = ''.join(('Output file ', fname, ' already written, ',
+                            'include finer time fields or num in fname.'))
+            raise ValueError(estr)
+        self._file = netCDF4.Dataset(fname, mode='w', format=self.format)
+        self.files.append(fname)
+        if self.period is not None:
+            self._period_end = start + self.period
+        logger.info('Opened %s', fname)
+
+        self._file.createDimension('epoch', None)
+        if self.format == 'NETCDF4':
+            cdfkey = self._create_variable(inst, 'epoch', np.int64, ('epoch',),
+                                           [len(inst.data)], quantize=False)
+            cdfkey.units = 'Microseconds since 1970-1-1 00:00:00'
+        else:
+            cdfkey = self._create_variable(inst, 'epoch', np.float64, ('epoch',),
+                                           [len(inst.data)], quantize=False)
+            cdfkey.units = 'Milliseconds since 1970-1-1 00:00:00'
+        cdfkey.long_name = 'UNIX time'
+        cdfkey.calendar = 'standard'
+
+        base_instrument = self.base_instrument
+        if base_instrument is None:
+            base_instrument = inst.__class__()
+        self._file.setncatts(inst._netcdf4_global_attrs(base_instrument))
+
+    def _create_variable(self, inst, name, coltype, dims, shape, meta=None,
+                         quantize=True):
+        """Create variable name in the current file, attaching meta."""
+        chunksizes = self.chunksizes
+        if chunksizes is None:
+            chunksizes = inst._netcdf4_chunk_length()
+        digit = self.least_significant_digit if quantize else None
+        var_kwargs = inst._netcdf4_var_kwargs(name, coltype, shape,
+                                              self.format, self.zlib,
+                                              self.complevel, self.shuffle,
+                                              chunksizes, digit)
+        string_type = (coltype == type(' ')) or (coltype == type(u' '))
+        new_dict = {}
+        if meta is not None:
+            new_dict = meta.to_dict()
+            for label in [u'_FillValue', u'FillVal']:
+                if label in new_dict.keys():
+                    if string_type:
+                        new_dict.pop(label)
+                    else:
+                        # make sure fill is the same type as the data
+                        new_dict[label] = np.array(new_dict[label]).astype(coltype)
+            # fill value may only be set when variable is created
+            if u'_FillValue' in new_dict.keys():
+                var_kwargs['fill_value'] = new_dict.pop(u'_FillValue')
+        cdfkey = self._file.createVariable(name, coltype, dimensions=dims,
+                                           **var_kwargs)
+        if len(new_dict) > 0:
+            cdfkey.setncatts(new_dict)
+        return cdfkey
+
+    def _get_meta(self, inst, key, col=None):
+        """Metadata for key (and col within a profile), None if missing."""
+        try:
+            if col is None:
+                return inst.meta[key]
+            return inst.meta[key][col]
+        except (KeyError, ValueError, AttributeError):
+            logger.warning('Unable to find MetaData for %s',
+                           ' '.join([key] if col is None else [key, col]))
+            return None
+
+    def _profiles_outgrow(self, data):
+        """True if profiles in data are longer than the profile dimensions
+        of the current file."""
+        if len(self._file.variables['epoch']) == 0:
+            return False
+        for key in data.columns:
+            obj_dim_name = key + '_dimension_1'
+            if (data[key].dtype != np.dtype('O')) or \
+                    (obj_dim_name not in self._file.dimensions):
+                continue
+            max_len = len(self._file.dimensions[obj_dim_name])
+            if max([len(item) for item in data[key]]) > max_len:
+                return True
+        return False
+
+    def _append(self, inst, data):
+        """Append rows in data, taken from inst, to the current file."""
+        variables = self._file.variables
+        start = len(variables['epoch'])
+        stop = start + len(data)
+        num = len(inst.data)
+
+        variables['epoch'][start:stop] = \
+            inst._netcdf4_encode_times(data.index.values, self.format)
+
+        for key in data.columns:
+            values, coltype, datetime_flag = inst._get_data_info(data[key],
+                                                                 self.format)
+            string_type = (coltype == type(' ')) or (coltype == type(u' '))
+            if (data[key].dtype != np.dtype('O')) or string_type:
+                if key not in variables:
+                    self._create_variable(inst, key, coltype, ('epoch',),
+                                          [num], self._get_meta(inst, key))
+                if datetime_flag:
+                    values = inst._netcdf4_encode_times(values.values,
+                                                        self.format)
+                else:
+                    values = values.values
+                variables[key][start:stop] = values
+            else:
+                self._append_profiles(inst, key, data[key], start, stop, num)
+
+    def _append_profiles(self, inst, key, profiles, start, stop, num):
+        """Append a column of profiles to the current file."""
+        variables = self._file.variables
+        lengths = np.array([len(item) for item in profiles])
+        data_loc = lengths.argmax()
+        obj_dim_name = key + '_dimension_1'
+        if obj_dim_name not in self._file.dimensions:
+            # a zero length dimension would be unlimited
+            max_len = max(lengths.max(), self.max_profile_length or 0, 1)
+            self._file.createDimension(obj_dim_name, max_len)
+            # length of each profile, so padding is trimmed when loaded
+            cdfkey = self._create_variable(inst, obj_dim_name + '_length',
+                                           np.int32, ('epoch',), [num],
+                                           quantize=False)
+            cdfkey.pysat_profile_lengths = obj_dim_name
+        max_len = len(self._file.dimensions[obj_dim_name])
+        var_dim = ('epoch', obj_dim_name)
+        variables[obj_dim_name + '_length'][start:stop] = \
+            lengths.astype(np.int32)
+
+        stacked = pds.concat(profiles.tolist())
+        try:
+            iterable = profiles.iloc[data_loc].columns
+            is_frame = True
+        except AttributeError:
+            # looking at a series, which doesn't have columns
+            iterable = [profiles.iloc[data_loc].name]
+            is_frame = False
+
+        for col in iterable:
+            name = key + '_' + col
+            if is_frame:
+                _, coltype, _ = inst._get_data_info(profiles.iloc[data_loc][col],
+                                                    self.format)
+                values = stacked[col].values
+                meta = self._get_meta(inst, key, col)
+            else:
+                _, coltype, _ = inst._get_data_info(profiles.iloc[data_loc],
+                                                    self.format)
+                values = stacked.values
+                meta = self._get_meta(inst, key)
+            if name not in variables:
+                self._create_variable(inst, name, coltype, var_dim,
+                                      [num, max_len], meta)
+            variables[name][start:stop, :] = \
+                inst._stack_profiles(values.astype(coltype), lengths, max_len)
+
+        # store the profile index
+        _, coltype, datetime_flag = \
+            inst._get_data_info(profiles.iloc[data_loc].index, self.format)
+        if obj_dim_name not in variables:
+            cdfkey = self._create_variable(inst, obj_dim_name, coltype,
+                                           var_dim, [num, max_len],
+                                           quantize=False)
+            if datetime_flag:
+                if self.format == 'NETCDF4':
+                    cdfkey.units = 'Microseconds since 1970-1-1 00:00:00'
+                else:
+                    cdfkey.units = 'Milliseconds since 1970-1-1 00:00:00'
+                cdfkey.long_name = 'UNIX time'
+            elif profiles.iloc[data_loc].index.name is not None:
+                cdfkey.long_name = profiles.iloc[data_loc].index.name
+            else:
+                cdfkey.long_name = key
+        if datetime_flag:
+            values = inst._netcdf4_encode_times(stacked.index.values,
+                                                self.format)
+        else:
+            values = stacked.index.values.astype(coltype)
+        variables[obj_dim_name][start:stop, :] = \
+            inst._stack_profiles(values, lengths, max_len)
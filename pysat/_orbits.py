@@ -2,11 +2,14 @@ from __future__ import print_function
 from __future__ import absolute_import
 
 import functools
+import logging
 
 import numpy as np
 import pandas as pds
 from pysat import Series, DataFrame
 
+logger = logging.getLogger('pysat.orbits')
+
 
 class Orbits(object):
     """Determines orbits on the fly and provides orbital data in .data.
@@ -187,7 +190,7 @@ class Orbits(object):
             # done for robustness
             if len(ind) > 1:
                 if min(dist) == 1:
-                    print('There are orbit breaks right next to each other')
+                    logger.info('There are orbit breaks right next to each other')
                 ind = ind[:-1][dist > 1]
 
             # check for large positive gradients around the break that would
@@ -234,7 +237,7 @@ class Orbits(object):
             ind = np.hstack((ind, ut_ind))
             ind = np.sort(ind)
             ind = np.unique(ind)
-            print('Time Gap')
+            logger.info('Time Gap')
 
         # now that most problems in orbits should have been caught, look at
         # the time difference between orbits (not individual orbits)
@@ -450,7 +453,7 @@ class Orbits(object):
                         # print 'going for basic orbit'
                         self._getBasicOrbit(orbit=1)
                         # includes hack to appear to be zero indexed
-                        print('Loaded Orbit:%i' % (self.current - 1))
+                        logger.info('Loaded Orbit:%i', self.current - 1)
                         # check if the first orbit is also the last orbit
 
                 elif orbit == self.num:
@@ -467,7 +470,7 @@ class Orbits(object):
                     # load orbit data into data
                     self._getBasicOrbit(orbit)
                     # includes hack to appear to be zero indexed
-                    print('Loaded Orbit:%i' % (self.current - 1))
+                    logger.info('Loaded Orbit:%i', self.current - 1)
 
                 else:
                     # gone too far
@@ -476,7 +479,7 @@ class Orbits(object):
             else:
                 raise Exception('Must set an orbit')
         else:
-            print('No data loaded in instrument object to determine orbits.')
+            logger.info('No data loaded in instrument object to determine orbits.')
 
     def next(self, *arg, **kwarg):
         """Load the next orbit into .data.
@@ -527,7 +530,7 @@ class Orbits(object):
                         pass
                     del temp_orbit_data
                 # includes hack to appear to be zero indexed
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
 
             elif self.current == (self.num):
                 # at the last orbit, need to be careful about getting the next orbit
@@ -574,7 +577,7 @@ class Orbits(object):
 
                 del temp_orbit_data
                 # includes hack to appear to be zero indexed
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
 
             elif self.current == 0:
                 # no current orbit set, grab the first one
@@ -586,7 +589,7 @@ class Orbits(object):
                 # since we aren't close to the last orbit, just pull the next orbit
                 self._getBasicOrbit(orbit=self.current + 1)
                 # includes hack to appear to be zero indexed
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
 
             else:
                 raise Exception(
@@ -619,7 +622,7 @@ class Orbits(object):
             if (self.current > 2) & (self.current <= self.num):
                 # load orbit and put it into self.sat.data
                 self._getBasicOrbit(orbit=self.current - 1)
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
 
             # if current orbit near the first, must be careful
             elif self.current == 2:
@@ -658,7 +661,7 @@ class Orbits(object):
     
                     del temp_orbit_data
                     
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
                 
             elif self.current == 0:
                 self.load(orbit=-1)
@@ -700,7 +703,7 @@ class Orbits(object):
                     self._getBasicOrbit(orbit=-1)
                         
                 del temp_orbit_data
-                print('Loaded Orbit:%i' % (self.current - 1))
+                logger.info('Loaded Orbit:%i', self.current - 1)
 
             else:
                 raise Exception(
@@ -35,6 +35,8 @@ name = 'star'
 tags = {'':''}
 sat_ids = {'':['']}
 test_dates = {'':{'':pysat.datetime(2007,1,1)}}
+# no cleaning currently done, any subset of columns may be loaded
+required_columns = []
 
 def list_files(tag='', sat_id=None, data_path=None, format_str=None):
     """Return a Pandas Series of every file for chosen satellite data
@@ -75,7 +77,7 @@ def list_files(tag='', sat_id=None, data_path=None, format_str=None):
         return pysat.Files.from_os(data_path=data_path, format_str=format_str)
 
 
-def load(fnames, tag=None, sat_id=None):
+def load(fnames, tag=None, sat_id=None, columns=None):
     """Load CHAMP STAR files
 
     Parameters
@@ -86,6 +88,8 @@ def load(fnames, tag=None, sat_id=None):
         tag or None (default=None)
     sat_id : (str or NoneType)
         satellite id or None (default=None)
+    columns : (list or NoneType)
+        names of columns to read, None reads all (default=None)
 
     Returns
     ---------
@@ -172,11 +176,18 @@ def load(fnames, tag=None, sat_id=None):
     except:
         pass
 
+    # Only read the requested columns, plus those needed for the time
+    names = [champ_labels[h] for h in hdata]
+    if columns is not None:
+        hdata = [h for h in hdata if (champ_labels[h] in columns) or
+                 (champ_labels[h] in ['year', 'doy', 'sod'])]
+    usecols = [champ_labels[h] for h in hdata]
+
     # If there are files, read in the data
     data = pds.read_csv(fnames[0], delim_whitespace=True, skiprows=2,
-                        header=None, names=[champ_labels[h] for h in hdata],
+                        header=None, names=names, usecols=usecols,
                         keep_date_col=True, index_col='datetime',
-                        parse_dates={'datetime': [0,1,2]},
+                        parse_dates={'datetime': ['year', 'doy', 'sod']},
                         date_parser=parse_champdate)
 
     # Initialize the meta data
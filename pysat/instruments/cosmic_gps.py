@@ -48,6 +48,8 @@ test_dates = {'':{'ionprf':pysat.datetime(2008,1,1),
                     'sonprf':pysat.datetime(2008,1,1),
                     'wetprf':pysat.datetime(2008,1,1),
                     'atmprf':pysat.datetime(2008,1,1)}}
+# load reads any number of files, used for multi-day loads
+multi_file_load = True
 
 
 def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
@@ -104,11 +106,13 @@ def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
     
         year=np.array(year).astype(int)
         days=np.array(days).astype(int)
-        uts=np.array(hours).astype(int)*3600+np.array(minutes).astype(int)*60
+        ut_ns = (np.array(hours).astype(np.int64)*3600 + 
+                 np.array(minutes).astype(np.int64)*60)*10**9
         # adding microseconds to ensure each time is unique, not allowed to
         # pass 1.E-3 s
-        uts+=np.mod(np.array(microseconds).astype(int)*1.E-6, 1.E-3)
-        index = pysat.utils.create_datetime_index(year=year, day=days, uts=uts)
+        ut_ns += np.mod(np.array(microseconds).astype(np.int64), 1000)*1000
+        index = pysat.utils.create_datetime_index(year=year, day=days, 
+                                                  ut_ns=ut_ns)
         file_list = pysat.Series(cosmicFiles, index=index)
         return file_list
     else:
@@ -128,9 +132,12 @@ def load(cosmicFiles, tag=None, sat_id=None):
         # call separate load_files routine, segemented for possible
         # multiprocessor load, not included and only benefits about 20%
         output = pysat.DataFrame(load_files(cosmicFiles, tag=tag, sat_id=sat_id))
+        # whole minutes are exact integers, only seconds are rounded
+        ut_ns = (output.hour.values.astype(np.int64)*3600 + 
+                 output.minute.values.astype(np.int64)*60)*10**9 + \
+            np.round(output.second.values*1.E9).astype(np.int64)
         output.index = pysat.utils.create_datetime_index(year=output.year, 
-                month=output.month, day=output.day, 
-                uts=output.hour*3600.+output.minute*60.+output.second)
+                month=output.month, day=output.day, ut_ns=ut_ns)
         # make sure UTS strictly increasing
         output.sort_index(inplace=True)
         # use the first available file to pick out meta information
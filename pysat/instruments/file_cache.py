@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Keeps parsed data files in memory for instruments whose files hold more
+than the day pysat loads at a time.
+
+Monthly (or yearly) files such as those used by sw_kp, sw_dst, and CDAWeb
+instruments with fake_daily_files_from_monthly are parsed once and each day
+is served as a slice of the parsed data. Parsed files are evicted, least
+recently used first, once the cache holds more than max_bytes.
+
+Examples
+--------
+::
+
+    from pysat.instruments import file_cache
+
+    # allow up to 1 GB of parsed files
+    file_cache.cache.max_bytes = 1024**3
+    # discard everything
+    file_cache.cache.clear()
+
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import re
+import collections
+import threading
+
+import pandas as pds
+
+import pysat
+
+
+class FileCache(object):
+    """Parsed files, keyed by filename, bounded in total size.
+
+    Parameters
+    ----------
+    max_bytes : int
+        upper limit on the memory used by parsed files. The most recently
+        used file is always kept, even if larger. (default=256 MB)
+
+    """
+
+    def __init__(self, max_bytes=256*1024**2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all parsed files."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get(self, fname, parse, key=None):
+        """Return parse(fname), parsing only if not already cached.
+
+        Parameters
+        ----------
+        fname : string
+            full path of the file
+        parse : function
+            called as parse(fname), returns a pandas.DataFrame or a tuple
+            whose first element is a pandas.DataFrame
+        key : hashable
+            distinguishes different ways of parsing the same file
+            (default=None)
+
+        Note
+        ----
+        Entries are also keyed by the file's modification time and size,
+        so files that are downloaded again are parsed again.
+
+        """
+        stat = os.stat(fname)
+        full_key = (fname, key, stat.st_mtime, stat.st_size)
+        with self._lock:
+            if full_key in self._entries:
+                # most recently used entries are kept at the end
+                entry = self._entries.pop(full_key)
+                self._entries[full_key] = entry
+                return entry[0]
+
+        value = parse(fname)
+        frame = value[0] if isinstance(value, tuple) else value
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            if full_key not in self._entries:
+                self._entries[full_key] = (value, nbytes)
+                self.nbytes += nbytes
+            self._evict()
+        return value
+
+    def _evict(self):
+        """Drop least recently used entries until within max_bytes."""
+        while (self.nbytes > self.max_bytes) and (len(self._entries) > 1):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+
+
+def day_slice(data, date):
+    """Copy of the rows of data, sorted by time, falling on date."""
+    start = data.index.searchsorted(date, side='left')
+    stop = data.index.searchsorted(date + pds.DateOffset(days=1), side='left')
+    # copied so processing of one day can't alter the cached file
+    return data.iloc[start:stop].copy()
+
+
+# date appended to each real filename by list_files, e.g. 'kp0901.tab_2009-01-05'
+_fake_daily_suffix = re.compile(r'_(\d{4}-\d{2}-\d{2})$')
+
+
+def split_fname(filename):
+    """Split a fake daily filename into the real filename and its date.
+    
+    Raises ValueError if filename doesn't end with a date.
+    
+    """
+    match = _fake_daily_suffix.search(filename)
+    if match is None:
+        raise ValueError('No date appended to ' + filename)
+    date = pysat.datetime.strptime(match.group(1), '%Y-%m-%d')
+    return filename[0:match.start()], date
+
+
+# shared by every instrument module
+cache = FileCache()
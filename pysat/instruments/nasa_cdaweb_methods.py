@@ -4,11 +4,14 @@
 
 from __future__ import absolute_import, division, print_function
 
+import functools
 import pandas as pds
 import numpy as np
 import pysat
 import sys
 
+from . import file_cache
+
 
 def list_files(tag=None, sat_id=None, data_path=None, format_str=None,
                supported_tags=None, fake_daily_files_from_monthly=False,
@@ -81,7 +84,7 @@ def list_files(tag=None, sat_id=None, data_path=None, format_str=None,
 
 def load(fnames, tag=None, sat_id=None, 
          fake_daily_files_from_monthly=False,
-         flatten_twod=True):
+         flatten_twod=True, columns=None):
     """Load NASA CDAWeb CDF files
 
     Parameters
@@ -98,6 +101,8 @@ def load(fnames, tag=None, sat_id=None,
         parses of daily dates to monthly files that were added internally
         by the list_files routine, when flagged. These dates are
         used here to provide data by day. 
+    columns : list of strings or None
+        names of variables to return, None (default) returns all
 
     Returns
     ---------
@@ -122,18 +127,39 @@ def load(fnames, tag=None, sat_id=None,
         
         if fake_daily_files_from_monthly:
             # parse out date from filename
-            fname = fnames[0][0:-11]
-            date = pysat.datetime.strptime(fnames[0][-10:], '%Y-%m-%d')
-            with pysatCDF.CDF(fname) as cdf:
-                # convert data to pysat format
-                data, meta = cdf.to_pysat(flatten_twod=flatten_twod)
-                # select data from monthly
-                data = data.ix[date:date+pds.DateOffset(days=1) - pds.DateOffset(microseconds=1),:]
-                return data, meta     
+            fname, date = file_cache.split_fname(fnames[0])
+            # monthly file is converted once, days are selected from it
+            data, meta = file_cache.cache.get(fname, 
+                                              functools.partial(_read_cdf,
+                                                  flatten_twod=flatten_twod),
+                                              key=flatten_twod)
+            # select data from monthly, then only the requested columns
+            # are taken from the day rather than the whole month
+            data = file_cache.day_slice(data, date)
+            return _select_columns(data, columns), meta.copy()
         else:
             # basic data return 
             with pysatCDF.CDF(fnames[0]) as cdf:     
-                return cdf.to_pysat(flatten_twod=flatten_twod)
+                data, meta = cdf.to_pysat(flatten_twod=flatten_twod)
+                return _select_columns(data, columns), meta
+
+
+def _read_cdf(fname, flatten_twod=True):
+    """Convert the CDF file fname to pysat format"""
+    import pysatCDF
+
+    with pysatCDF.CDF(fname) as cdf:
+        data, meta = cdf.to_pysat(flatten_twod=flatten_twod)
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    return data, meta
+
+
+def _select_columns(data, columns):
+    """Return data restricted to columns, if any"""
+    if columns is None:
+        return data
+    return data[[col for col in data.columns if col in columns]]
 
 def download(supported_tags, date_array, tag, sat_id, 
              ftp_site='cdaweb.gsfc.nasa.gov', 
@@ -53,6 +53,8 @@ tags = {'1min':'1-minute time averaged data',
 sat_ids = {'':['1min', '5min']}
 test_dates = {'':{'1min':pysat.datetime(2009,1,1),
                   '5min':pysat.datetime(2009,1,1)}}
+# clean works on whatever columns are loaded
+required_columns = []
 
 
 def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
@@ -102,7 +104,7 @@ def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
         return pysat.Files.from_os(data_path=data_path, format_str=format_str)
             
 
-def load(fnames, tag=None, sat_id=None):
+def load(fnames, tag=None, sat_id=None, columns=None):
     import pysatCDF
     
     if len(fnames) <= 0 :
@@ -113,6 +115,8 @@ def load(fnames, tag=None, sat_id=None):
         date = pysat.datetime.strptime(fnames[0][-10:], '%Y-%m-%d')
         with pysatCDF.CDF(fname) as cdf:
             data, meta = cdf.to_pysat()
+            if columns is not None:
+                data = data[[col for col in data.columns if col in columns]]
             # pick out data for date
             data = data.ix[date:date+pds.DateOffset(days=1) - pds.DateOffset(microseconds=1)] 
             return data, meta
@@ -132,35 +136,92 @@ def time_shift_to_magnetic_poles(inst):
     
     Time shift calculated using distance to bow shock nose (BSN)
     and velocity of solar wind along x-direction.
+
+    Note
+    ----
+    Works on all data loaded in inst. Load several days at once, e.g.
+    with inst.load(start=start, stop=stop) or Instrument.iter_window, to 
+    resample and shift the whole window in one pass.
+
+    Examples
+    --------
+    ::
+
+        omni = pysat.Instrument('omni', 'hro', tag='1min')
+        omni.load(start=pysat.datetime(2009,1,1), 
+                  stop=pysat.datetime(2009,2,1))
+        pysat.instruments.omni_hro.time_shift_to_magnetic_poles(omni)
     
     """
     
-    # need to fill in Vx to get an estimate of what is going on
-    inst['Vx'] = inst['Vx'].interpolate('nearest')
-    inst['Vx'] = inst['Vx'].fillna(method='backfill')
-    inst['Vx'] = inst['Vx'].fillna(method='pad')
-
-    inst['BSN_x'] = inst['BSN_x'].interpolate('nearest')
-    inst['BSN_x'] = inst['BSN_x'].fillna(method='backfill')
-    inst['BSN_x'] = inst['BSN_x'].fillna(method='pad')
+    data = inst.data
+    times = data.index.values.astype('datetime64[ns]').view(np.int64)
 
     # make sure there are no gaps larger than a minute
-    inst.data = inst.data.resample('1T').interpolate('time')
+    minute = np.int64(60*1e9)
+    first = times[0] // minute * minute
+    grid = np.arange(first, times[-1] + 1, minute, dtype=np.int64)
+    # only samples falling on the minute grid are used, as with resample
+    on_grid = (times - first) % minute == 0
+    grid_times = times[on_grid]
+
+    new_data = {}
+    for key in data.columns:
+        values = np.asarray(data[key].values, dtype=float)[on_grid]
+        if key in ['Vx', 'BSN_x']:
+            # need to fill in Vx to get an estimate of what is going on
+            values = _fill_nearest(grid_times, values)
+        new_data[key] = _interp_time(grid, grid_times, values)
 
-    time_x = inst['BSN_x']*6371.2/-inst['Vx']
+    time_x = new_data['BSN_x']*6371.2/-new_data['Vx']
     idx, = np.where(np.isnan(time_x))
     if len(idx) > 0:
         print (time_x[idx])
         print (time_x)
-    time_x_offset = [pds.DateOffset(seconds = time) for time in time_x.astype(int)]
-    new_index=[]
-    for i, time in enumerate(time_x_offset):
-        new_index.append(inst.data.index[i] + time)
-    inst.data.index = new_index
-    inst.data = inst.data.sort_index()    
+    # whole seconds, truncated as before
+    new_index = grid + time_x.astype(np.int64)*np.int64(1e9)
+    order = np.argsort(new_index, kind='mergesort')
+    inst.data = pysat.DataFrame(dict((key, new_data[key][order]) 
+                                     for key in data.columns),
+                                index=pds.DatetimeIndex(
+                                    new_index[order].view('datetime64[ns]')),
+                                columns=data.columns)
     
     return
 
+
+def _fill_nearest(times, values):
+    """Replace NaN values with the value of the nearest valid time."""
+    good = ~np.isnan(values)
+    if good.all() or (not good.any()):
+        return values
+    good_times = times[good]
+    good_values = values[good]
+    # valid neighbours on either side, ties go to the earlier sample
+    right = np.clip(np.searchsorted(good_times, times), 0, len(good_times)-1)
+    left = np.clip(right - 1, 0, len(good_times)-1)
+    use_left = np.abs(times - good_times[left]) <= \
+        np.abs(good_times[right] - times)
+    nearest = np.where(use_left, left, right)
+    return np.where(good, values, good_values[nearest])
+
+
+def _interp_time(grid, times, values):
+    """Linearly interpolate values at times onto grid, in time.
+
+    Times before the first valid value are NaN, times after the last valid
+    value take the last valid value.
+
+    """
+    good = ~np.isnan(values)
+    out = np.full(len(grid), np.nan)
+    if not good.any():
+        return out
+    good_times = times[good]
+    out[:] = np.interp(grid, good_times, values[good])
+    out[grid < good_times[0]] = np.nan
+    return out
+
 def download(date_array, tag, sat_id, data_path=None, user=None, password=None):
     """
     download OMNI data, layout consistent with pysat
@@ -33,6 +33,7 @@ import numpy as np
 
 import pysat
 from . import nasa_cdaweb_methods as cdw
+from . import file_cache
 
 platform = 'sw'
 name = 'kp'
@@ -41,17 +42,60 @@ sat_ids = {'':['']}
 test_dates = {'':{'':pysat.datetime(2009,1,1)}}
 
 
-# create a basic parser to deal with date format of the Kp file
-def _parse(yr, mo, day):
-    """
-    Basic parser to deal with date format of the Kp file.
+# character spans of the eight three-hourly Kp values on each line
+_kp_spans = [(7,10), (10,13), (13,16), (16,19), (19,23), (23,26), (26,29),
+             (29,32)]
+# two digit years before this are in the 2000s, as in list_files
+_two_digit_year_break = 94
+# Kp flags, indexed by character code, as fractions of a unit
+_flag_offsets = np.zeros(256)
+_flag_offsets[ord('+')] = 1./3.
+_flag_offsets[ord('-')] = -1./3.
+
+
+class _KpBlock(object):
+    """Kp Instrument and the span of dates last loaded into it.
+
+    filter_geoquiet loads about a month of Kp at once and reuses it while
+    later dates fall within the span loaded. The span requested is kept,
+    rather than that of the data returned, so dates near the end of the Kp
+    record don't load the same block again.
+
+    Parameters
+    ----------
+    inst : pysat.Instrument or NoneType
+        Kp Instrument, created on first use if None
+
     """
-    
-    yr = '20'+yr
-    yr = int(yr)
-    mo = int(mo)
-    day = int(day)
-    return pds.datetime(yr, mo, day)
+
+    def __init__(self, inst=None):
+        self.inst = inst
+        self.start = None
+        self.stop = None
+
+    def load(self, date):
+        """Ensure inst holds Kp data from a day before to a day after date.
+
+        Parameters
+        ----------
+        date : datetime
+            date of the data being filtered
+
+        """
+        if self.inst is None:
+            self.inst = pysat.Instrument('sw', 'kp')
+        start = date - pds.DateOffset(days=1)
+        stop = date + pds.DateOffset(days=2)
+        if (self.start is not None) and (self.start <= start) and \
+                (stop <= self.stop):
+            return
+        self.start = start
+        self.stop = start + pds.DateOffset(days=32)
+        self.inst.load(start=self.start, stop=self.stop)
+
+
+# Kp shared by filter_geoquiet calls made without Kp data
+_shared_kp = _KpBlock()
 
 
 def load(fnames, tag=None, sat_id=None):
@@ -81,52 +125,82 @@ def load(fnames, tag=None, sat_id=None):
 
     # Kp data stored monthly, need to return data daily
     # the daily date is attached to filename
-    # parse off the last date, load month of data, downselect to desired day
-    data = pds.DataFrame()
-    #set up fixed width format for these files
-    colspec = [(0,2),(2,4),(4,6),(7,10),(10,13),(13,16),(16,19),(19,23),(23,26),(26,29),(29,32),(32,50)]
+    # each month is parsed once, days are selected from the cached month
+    data = []
     for filename in fnames:
-        # the daily date is attached to filename
-        # parse off the last date, load month of data, downselect to desired day
-        fname = filename[0:-11]
-        date = pysat.datetime.strptime(filename[-10:], '%Y-%m-%d')
-
-        temp = pds.read_fwf(fname, colspecs=colspec, skipfooter=4,header=None, 
-                            parse_dates=[[0,1,2]], date_parser=_parse, 
-                            index_col='0_1_2')
-        idx, = np.where((temp.index >= date) & (temp.index < date+pds.DateOffset(days=1)))
-        temp = temp.iloc[idx,:]
-        data = pds.concat([data,temp], axis=0)
+        fname, date = file_cache.split_fname(filename)
+        month = file_cache.cache.get(fname, _read_month)
+        data.append(file_cache.day_slice(month, date))
+    if len(data) == 0:
+        return pds.DataFrame(None), pysat.Meta()
+    result = data[0] if len(data) == 1 else pds.concat(data, axis=0)
         
-    # drop last column as it has data I don't care about
-    data = data.iloc[:,0:-1]
-    
-    # each column increments UT by three hours
-    # produce a single data series that has Kp value monotonically increasing in time
-    # with appropriate datetime indices
-    s = pds.Series()
-    for i in np.arange(8):
-        temp = pds.Series(data.iloc[:,i].values, 
-                          index=data.index+pds.DateOffset(hours=int(3*i))  )
-        #print temp
-        s = s.append(temp) 
-    s = s.sort_index()
-    s.index.name = 'time'
-    
+    return result, pysat.Meta()
+
+
+def _read_month(fname):
+    """Read a monthly Kp file into a DataFrame of Kp values
+
+    Each line holds a yymmdd date followed by eight three-hourly Kp values
+    written as a digit and a flag, e.g. 2-, 2o, and 2+. Lines are parsed
+    together as a fixed width character array.
+
+    """
+
+    with open(fname, 'rb') as f:
+        # last four lines are a summary, not daily values
+        lines = f.read().splitlines()[:-4]
+    return _parse_lines(lines)
+
+
+def _parse_lines(lines):
+    """Convert lines from Kp files into a DataFrame of Kp values"""
+
+    width = _kp_spans[-1][1] + 1
+    chars = np.array(lines, dtype='S{:d}'.format(width))
+    chars = chars.view(np.uint8).reshape(len(chars), width)
+    digits = chars.astype(np.int64) - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+    # only keep lines that start with a date
+    good = is_digit[:, 0:6].all(axis=1)
+    chars, digits, is_digit = chars[good], digits[good], is_digit[good]
+
+    # two digit year, month, and day to days since 1970
+    yr = 10*digits[:, 0] + digits[:, 1]
+    yr += np.where(yr < _two_digit_year_break, 2000, 1900)
+    mo = 10*digits[:, 2] + digits[:, 3]
+    day = 10*digits[:, 4] + digits[:, 5]
+    days = ((yr - 1970)*12 + mo - 1).astype('datetime64[M]')
+    days = days.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+
+    # gather the eight values into (lines, 8, span width), padded with a
+    # trailing space so every value has a character after its digit
+    span = max([stop - start for (start, stop) in _kp_spans]) + 1
+    fields = np.full((len(chars), 8, span), ord(' '), dtype=np.uint8)
+    for i, (start, stop) in enumerate(_kp_spans):
+        fields[:, i, 0:stop-start] = chars[:, start:stop]
+    values = fields.astype(np.int64) - ord('0')
+    field_digit = (values >= 0) & (values <= 9)
+    # first digit in each field, followed by its flag
+    loc = field_digit.argmax(axis=2)
+    rows = np.arange(len(fields))[:, np.newaxis]
+    cols = np.arange(8)[np.newaxis, :]
+    first = values[rows, cols, loc].astype(float)
+    flag = fields[rows, cols, loc + 1]
     # now, Kp comes in non-user friendly values
     # 2-, 2o, and 2+ relate to 1.6, 2.0, 2.3
     # will convert for user friendliness
-    first = np.array([float(x[0]) for x in s])
-    flag = np.array([x[1] for x in s])
+    kp = first + _flag_offsets[flag]
+    kp[~field_digit.any(axis=2)] = np.nan
 
-    ind, = np.where(flag == '+')
-    first[ind] += 1./3.
-    ind, = np.where(flag == '-')
-    first[ind] -= 1./3.
-    
-    result = pds.DataFrame(first, columns=['kp'], index=s.index)
-        
-    return result, pysat.Meta()
+    # each column increments UT by three hours
+    times = days.astype('datetime64[ns]')[:, np.newaxis] + \
+        np.arange(0, 24, 3).astype('timedelta64[h]')
+    index = pds.DatetimeIndex(times.ravel(), name='time')
+    result = pds.DataFrame(kp.ravel(), columns=['kp'], index=index)
+    if not result.index.is_monotonic_increasing:
+        result = result.sort_index()
+    return result
     
 def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
     """Return a Pandas Series of every file for chosen satellite data
@@ -166,7 +240,7 @@ def list_files(tag=None, sat_id=None, data_path=None, format_str=None):
                 format_str = 'kp{year:2d}{month:02d}.tab'
             out = pysat.Files.from_os(data_path=data_path, 
                 format_str=format_str,
-                two_digit_year_break=94)
+                two_digit_year_break=_two_digit_year_break)
             if not out.empty:
                 out.ix[out.index[-1]+pds.DateOffset(months=1)-
                          pds.DateOffset(days=1)] = out.iloc[-1]  
@@ -236,8 +310,8 @@ def download(date_array, tag, sat_id, data_path, user=None, password=None):
 def filter_geoquiet(sat, maxKp=None, filterTime=None, kpData=None, kp_inst=None):
     """Filters pysat.Instrument data for given time after Kp drops below gate.
     
-    Loads Kp data for the same timeframe covered by sat and sets sat.data to
-    NaN for times when Kp > maxKp and for filterTime after Kp drops below maxKp.
+    Loads Kp data for the same timeframe covered by sat and removes sat.data 
+    for times when Kp > maxKp and for filterTime after Kp drops below maxKp.
     
     Parameters
     ----------
@@ -257,15 +331,27 @@ def filter_geoquiet(sat, maxKp=None, filterTime=None, kpData=None, kp_inst=None)
     -------
     None : NoneType
         sat Instrument object modified in place
+
+    Note
+    ----
+    Kp data is loaded in blocks of about a month and reused by later calls
+    that fall within the loaded block. The block loaded into kp_inst is 
+    tracked by its _kp_block attribute. Without kp_inst or kpData, a single
+    Kp Instrument is created and shared by all calls.
         
     """
+    # date of satellite data
+    date = sat.date
     if kp_inst is not None:
-        kp_inst.load(date=sat.date, verifyPad=True)
+        block = getattr(kp_inst, '_kp_block', None)
+        if block is None:
+            block = _KpBlock(kp_inst)
+            kp_inst._kp_block = block
+        block.load(date)
         kpData = kp_inst
     elif kpData is None:
-        kp = pysat.Instrument('sw', 'kp', pad=pds.DateOffset(days=1))
-        kp.load(date=sat.date, verifyPad=True)
-        kpData = kp
+        _shared_kp.load(date)
+        kpData = _shared_kp.inst
         
     
     if maxKp is None:
@@ -275,14 +361,27 @@ def filter_geoquiet(sat, maxKp=None, filterTime=None, kpData=None, kp_inst=None)
         filterTime = 24
         
     # now the defaults are ensured, let's do some filtering
-    # date of satellite data
-    date = sat.date
-    selData = kpData[date-pds.DateOffset(days=1):date+pds.DateOffset(days=1)]
-    ind, = np.where(selData['kp'] >= maxKp)
-    for lind in ind:
-        sat.data[selData.index[lind]:(selData.index[lind]+pds.DateOffset(hours=filterTime) )] = np.NaN
-        sat.data = sat.data.dropna(axis=0, how='all')
+    kp = kpData.data['kp']
+    first = kp.index.searchsorted(date - pds.DateOffset(days=1), side='left')
+    last = kp.index.searchsorted(date + pds.DateOffset(days=1), side='right')
+    kp = kp.iloc[first:last]
+    starts = kp.index.values[(kp >= maxKp).values]
+    if len(starts) == 0:
+        return
+
+    # each disturbed time starts an interval of filterTime hours, merge
+    # overlapping intervals into disjoint ones
+    ends = starts + np.timedelta64(int(filterTime*3600*1e9), 'ns')
+    new_group = np.ones(len(starts), dtype=bool)
+    new_group[1:] = starts[1:] > np.maximum.accumulate(ends)[:-1]
+    starts = starts[new_group]
+    ends = np.maximum.reduceat(ends, np.where(new_group)[0])
+
+    # satellite times within [start, end] of an interval
+    times = sat.data.index.values
+    loc = np.searchsorted(starts, times, side='right') - 1
+    mask = (loc >= 0) & (times <= ends[np.maximum(loc, 0)])
+    # rows without any data are also dropped, as before
+    sat.data = sat.data[~mask].dropna(axis=0, how='all')
 
     return
-    
-    
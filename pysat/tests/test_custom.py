@@ -1,3 +1,5 @@
+import os
+
 import pysat
 import pandas as pds
 import numpy as np
@@ -274,6 +276,157 @@ class TestBasics:
         self.add(custom3, 'add', at_pos=1)
         self.testInst.load(2009,1)
         
+class TestDependencies:
+    def setup(self):
+        '''Runs before every method to create a clean testing setup.'''
+        self.testInst = pysat.Instrument('pysat','testing', tag='10', clean_level='clean')
+        # closures hold the list rather than self, which can't be
+        # fingerprinted for the derived column cache
+        calls = []
+        self.calls = calls
+
+        def custom1(inst):
+            calls.append('custom1')
+            return ('doubleMLT', 2.*inst.data.mlt.values)
+        custom1.inputs = ['mlt']
+        custom1.outputs = ['doubleMLT']
+
+        def custom2(inst):
+            calls.append('custom2')
+            return ('tripleSLT', 3.*inst.data.slt.values)
+        custom2.inputs = ['slt']
+        custom2.outputs = ['tripleSLT']
+
+        def custom3(inst):
+            calls.append('custom3')
+            return ('quadMLT', 2.*inst.data.doubleMLT.values)
+        custom3.inputs = ['doubleMLT']
+        custom3.outputs = ['quadMLT']
+
+        self.testInst.custom.add(custom1, 'add')
+        self.testInst.custom.add(custom2, 'add')
+        self.testInst.custom.add(custom3, 'add')
+
+    def teardown(self):
+        '''Runs after every method to clean up previous testing.'''
+        del self.testInst
+
+    def test_all_functions_run_by_default(self):
+        self.testInst.load(2009,1)
+        assert self.calls == ['custom1', 'custom2', 'custom3']
+
+    def test_only_required_functions_run(self):
+        self.testInst.custom.requested = ['quadMLT']
+        self.testInst.load(2009,1)
+        ans1 = self.calls == ['custom1', 'custom3']
+        ans2 = 'tripleSLT' not in self.testInst.data.columns
+        ans3 = (self.testInst['quadMLT'] == 4.*self.testInst['mlt']).all()
+        assert ans1 & ans2 & ans3
+
+    def test_cached_columns_reused(self):
+        import tempfile
+        import shutil
+        cache_dir = tempfile.mkdtemp()
+        self.testInst.custom.cache_dir = cache_dir
+        self.testInst.load(2009,1)
+        self.calls[:] = []
+        self.testInst.load(2009,1)
+        shutil.rmtree(cache_dir)
+        ans1 = self.calls == []
+        ans2 = (self.testInst['quadMLT'] == 4.*self.testInst['mlt']).all()
+        assert ans1 & ans2
+
+    def test_cache_keys_follow_array_arguments(self):
+        def scale(inst, factors):
+            return ('scaled', factors[0]*inst['mlt'])
+        self.testInst.load(2009,1)
+        keys = []
+        for value in [0., 1.]:
+            factors = np.ones(10000)
+            factors[5000] = value
+            self.testInst.custom.clear()
+            self.testInst.custom.add(scale, 'add', 'end', factors)
+            keys.append(self.testInst.custom._cache_keys(self.testInst)[0])
+        assert keys[0] != keys[1]
+
+    def test_fingerprint_follows_function_body(self):
+        custom = pysat.Custom()
+        custom.add(lambda inst: ('scaled', 2.*inst['mlt']), 'add')
+        first = custom._fingerprint()
+        custom.clear()
+        custom.add(lambda inst: ('scaled', 3.*inst['mlt']), 'add')
+        assert custom._fingerprint() != first
+
+    def test_fingerprint_follows_closure_and_defaults(self):
+        def make(factor):
+            def scale(inst, offset=0.):
+                return ('scaled', factor*inst['mlt'] + offset)
+            return scale
+        prints = []
+        for func, kwargs in [(make(2.), {}), (make(3.), {}), 
+                             (make(2.), {'offset': 1.})]:
+            custom = pysat.Custom()
+            custom.add(func, 'add', **kwargs)
+            prints.append(custom._fingerprint())
+        assert len(set(prints)) == 3
+
+    def test_instances_are_not_fingerprinted(self):
+        import tempfile
+        import shutil
+        class Scale(object):
+            factor = 2.
+        scale = Scale()
+        def custom(inst):
+            return ('scaled', scale.factor*inst.data.mlt.values)
+        custom.inputs = ['mlt']
+        custom.outputs = ['scaled']
+        cache_dir = tempfile.mkdtemp()
+        self.testInst.custom.add(custom, 'add')
+        self.testInst.custom.cache_dir = cache_dir
+        self.testInst.load(2009,1)
+        keys = self.testInst.custom._cache_keys(self.testInst)
+        ans1 = self.testInst.custom._fingerprint() is None
+        ans2 = None not in keys[0:3]
+        ans3 = keys[3] is None
+        ans4 = (self.testInst['scaled'] == 2.*self.testInst['mlt']).all()
+        ans5 = len(os.listdir(cache_dir)) == 3
+        shutil.rmtree(cache_dir)
+        assert ans1 & ans2 & ans3 & ans4 & ans5
+
+    def test_independent_functions_run_concurrently(self):
+        import threading
+        # each function waits for the other to start, which only happens
+        # if both are running at the same time
+        started = [threading.Event(), threading.Event()]
+        met = []
+        def meet(inst, mine, other, name):
+            started[mine].set()
+            met.append(started[other].wait(10.))
+            return (name, inst.data.mlt.values)
+        meet.inputs = ['mlt']
+        meet.outputs = ['first', 'second']
+        testInst = pysat.Instrument('pysat','testing', tag='10', 
+                                    clean_level='clean')
+        testInst.custom.max_workers = 2
+        testInst.custom.add(meet, 'add', 'end', 0, 1, 'first')
+        testInst.custom.add(meet, 'add', 'end', 1, 0, 'second')
+        batches = testInst.custom._batches([True]*2)
+        testInst.load(2009,1)
+        ans1 = batches == [[0, 1]]
+        ans2 = met == [True, True]
+        ans3 = ('first' in testInst.data) & ('second' in testInst.data)
+        assert ans1 & ans2 & ans3
+
+    def test_concurrent_results_match_serial(self):
+        self.testInst.custom.max_workers = 2
+        batches = self.testInst.custom._batches([True]*3)
+        self.testInst.load(2009,1)
+        ans1 = batches == [[0, 1], [2]]
+        ans2 = (self.testInst['quadMLT'] == 4.*self.testInst['mlt']).all()
+        ans3 = (self.testInst['tripleSLT'] == 3.*self.testInst['slt']).all()
+        assert ans1 & ans2 & ans3
+
+
 class ConstellationTestBasics(TestBasics):
     def setup(self):
         '''Runs before every method to create a clean testing setup'''
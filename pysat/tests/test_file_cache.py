@@ -0,0 +1,80 @@
+"""
+tests the cache of parsed files used by monthly file instruments
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pds
+
+from nose.tools import assert_raises
+
+import pysat
+from pysat.instruments import file_cache
+
+
+class TestFileCache():
+    def setup(self):
+        '''Runs before every method to create a clean testing setup.'''
+        self.cache = file_cache.FileCache()
+        self.calls = []
+        self.fnames = []
+        for i in range(3):
+            handle, fname = tempfile.mkstemp()
+            os.close(handle)
+            self.fnames.append(fname)
+
+    def teardown(self):
+        for fname in self.fnames:
+            os.remove(fname)
+
+    def parse(self, fname):
+        self.calls.append(fname)
+        index = pds.date_range('2009-01-01', '2009-01-31 23:00', freq='H')
+        return pysat.DataFrame({'kp': np.arange(len(index), dtype=float)},
+                               index=index)
+
+    def test_parse_once(self):
+        for i in range(5):
+            data = self.cache.get(self.fnames[0], self.parse)
+        assert (self.calls == [self.fnames[0]]) & (len(data) == 744)
+
+    def test_key_parses_again(self):
+        self.cache.get(self.fnames[0], self.parse, key=1)
+        self.cache.get(self.fnames[0], self.parse, key=2)
+        assert len(self.calls) == 2
+
+    def test_eviction(self):
+        nbytes = self.parse(self.fnames[0]).memory_usage(deep=True).sum()
+        self.cache.max_bytes = 2*nbytes
+        for fname in self.fnames:
+            self.cache.get(fname, self.parse)
+        ans1 = len(self.cache) == 2
+        ans2 = self.cache.nbytes <= self.cache.max_bytes
+        # least recently used file was dropped
+        self.cache.get(self.fnames[0], self.parse)
+        ans3 = self.calls[-1] == self.fnames[0]
+        assert ans1 & ans2 & ans3
+
+    def test_clear(self):
+        self.cache.get(self.fnames[0], self.parse)
+        self.cache.clear()
+        assert (len(self.cache) == 0) & (self.cache.nbytes == 0)
+
+    def test_day_slice_is_copy(self):
+        data = self.cache.get(self.fnames[0], self.parse)
+        day = file_cache.day_slice(data, pysat.datetime(2009,1,2))
+        day['kp'] = -1.
+        ans1 = len(day) == 24
+        ans2 = day.index[0] == pysat.datetime(2009,1,2)
+        ans3 = (data['kp'] >= 0).all()
+        assert ans1 & ans2 & ans3
+
+
+def test_split_fname():
+    fname, date = file_cache.split_fname('/data/kp0901.tab_2009-01-05')
+    assert (fname == '/data/kp0901.tab') & (date == pysat.datetime(2009,1,5))
+
+
+def test_split_fname_needs_date():
+    assert_raises(ValueError, file_cache.split_fname, '/data/kp0901.tab')
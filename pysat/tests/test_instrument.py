@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 #Test some of the basic _core functions
+import os
 import sys
 import pysat
 import pandas as pds
@@ -147,6 +148,308 @@ class TestBasics:
         print(self.testInst)
         assert True
 
+    ############################
+    # test load profiling
+    def test_load_stats_empty_by_default(self):
+        self.testInst.load(2009,1)
+        assert self.testInst.load_stats.empty
+
+    def test_load_stats(self):
+        def testfunc(inst):
+            pass
+        self.testInst.custom.add(testfunc, 'modify')
+        self.testInst.profile_load = True
+        self.testInst.load(2009,1)
+        stages = list(self.testInst.load_stats['stage'])
+        ans1 = stages == ['load_rtn', 'default', 'clean', 'custom: testfunc',
+                          'pad_trim', 'meta_transfer']
+        ans2 = (self.testInst.load_stats['rows'] == 10).all()
+        assert ans1 & ans2
+
+    def test_load_report(self):
+        self.testInst.profile_load = True
+        self.testInst.bounds = (pysat.datetime(2009,1,1), pysat.datetime(2009,1,3))
+        for inst in self.testInst:
+            pass
+        report = self.testInst.load_report(reset=True)
+        ans1 = (report['calls'] == 3).all()
+        ans2 = report.loc['load_rtn', 'rows'] == 30
+        ans3 = self.testInst.load_report().empty
+        assert ans1 & ans2 & ans3
+
+    ############################
+    # test window iteration
+    def test_iter_window(self):
+        calls = []
+        def custom1(inst):
+            calls.append(inst.date)
+        self.testInst.custom.add(custom1, 'pass')
+        self.testInst.bounds = (pysat.datetime(2009,1,1), 
+                                pysat.datetime(2009,1,5))
+        starts = []
+        for inst in self.testInst.iter_window(3):
+            starts.append(inst.date)
+            assert len(inst.data) == 30
+            assert inst.data.index[0] == inst.date
+            assert inst.data.index.is_monotonic_increasing
+        ans1 = starts == list(pds.date_range('2009-01-01', '2009-01-03'))
+        ans2 = len(calls) == 5
+        assert ans1 & ans2
+
+    def test_iter_window_step(self):
+        self.testInst.bounds = (pysat.datetime(2009,1,1), 
+                                pysat.datetime(2009,1,7))
+        starts = [inst.date for inst in self.testInst.iter_window(3, step=2)]
+        assert starts == list(pds.date_range('2009-01-01', '2009-01-05', 
+                                             freq='2D'))
+
+    def test_iter_window_bad_width(self):
+        assert_raises(ValueError, next, self.testInst.iter_window(0))
+
+    ############################
+    # test time range loads
+    def test_load_range(self):
+        calls = []
+        def custom1(inst):
+            calls.append(len(inst.data))
+        self.testInst.custom.add(custom1, 'pass')
+        self.testInst.load(start=pysat.datetime(2009,1,1), 
+                           stop=pysat.datetime(2009,1,4))
+        ans1 = len(self.testInst.data) == 30
+        ans2 = self.testInst.data.index[-1] < pysat.datetime(2009,1,4)
+        ans3 = calls == [30]
+        ans4 = self.testInst.date == pysat.datetime(2009,1,1)
+        assert ans1 & ans2 & ans3 & ans4
+
+    def test_load_range_bad_stop(self):
+        assert_raises(ValueError, self.testInst.load, 
+                      start=pysat.datetime(2009,1,4), 
+                      stop=pysat.datetime(2009,1,1))
+
+    ############################
+    # test sub-daily iteration
+    def test_iter_sub_daily(self):
+        calls = []
+        def custom1(inst):
+            calls.append(inst.date)
+        testInst = pysat.Instrument('pysat', 'testing', clean_level='clean')
+        testInst.custom.add(custom1, 'pass')
+        testInst.bounds = (pysat.datetime(2009,1,1), 
+                           pysat.datetime(2009,1,2,18), '6H')
+        starts = []
+        for inst in testInst:
+            starts.append(inst.date)
+            assert len(inst.data) == 21600
+            assert inst.data.index[0] == inst.date
+        ans1 = starts == list(pds.date_range('2009-01-01', '2009-01-02 18:00', 
+                                             freq='6H'))
+        ans2 = len(calls) == 2
+        assert ans1 & ans2
+
+    def test_iter_sub_daily_across_midnight(self):
+        testInst = pysat.Instrument('pysat', 'testing', clean_level='clean')
+        testInst.bounds = (pysat.datetime(2009,1,1,23), 
+                           pysat.datetime(2009,1,2,0,30), '90min')
+        testInst.next()
+        ans1 = len(testInst.data) == 5400
+        ans2 = testInst.data.index[-1] == pysat.datetime(2009,1,2,0,29,59)
+        testInst.next()
+        ans3 = testInst.date == pysat.datetime(2009,1,2,0,30)
+        ans4 = testInst.data.index[0] == testInst.date
+        assert ans1 & ans2 & ans3 & ans4
+
+    ############################
+    # test column projection
+    def test_load_columns(self):
+        self.testInst.load(2009, 1, columns=['mlt', 'slt'])
+        assert list(self.testInst.data.columns) == ['mlt', 'slt']
+
+    def test_load_columns_from_init(self):
+        testInst = pysat.Instrument('pysat', 'testing', '10', 
+                                    columns=['dummy1'])
+        testInst.load(2009, 1)
+        assert list(testInst.data.columns) == ['dummy1']
+
+    def test_load_columns_keeps_custom_inputs(self):
+        def double(inst):
+            return ('doubled', 2*inst['dummy1'])
+        double.inputs = ['dummy1']
+        double.outputs = ['doubled']
+        self.testInst.custom.add(double, 'add')
+        self.testInst.load(2009, 1, columns=['doubled'])
+        assert list(self.testInst.data.columns) == ['doubled']
+
+    def test_projected_columns_undeclared_custom(self):
+        def double(inst):
+            return ('doubled', 2*inst['dummy1'])
+        self.testInst.custom.add(double, 'add')
+        self.testInst.columns = ['doubled']
+        assert self.testInst._projected_columns() is None
+
+    def test_projected_columns_declared_custom(self):
+        def double(inst):
+            return ('doubled', 2*inst['dummy1'])
+        double.inputs = ['dummy1']
+        double.outputs = ['doubled']
+        self.testInst.custom.add(double, 'add')
+        self.testInst.columns = ['doubled', 'mlt']
+        assert self.testInst._projected_columns() == ['dummy1', 'mlt']
+
+    ############################
+    # test processed data cache
+    def test_processed_cache(self):
+        from unittest.case import SkipTest
+        import shutil
+        import tempfile
+        try:
+            import pyarrow
+        except ImportError:
+            raise SkipTest
+        cache_dir = tempfile.mkdtemp()
+        # calls kept on the function, the contents of closures are part
+        # of the cache key
+        def custom1(inst):
+            custom1.calls.append(1)
+            return ('doubled', 2.*inst['mlt'])
+        for cache_format in ['arrow', 'parquet']:
+            custom1.calls = []
+            for i in range(2):
+                testInst = pysat.Instrument('pysat', 'testing', '10',
+                                            clean_level='clean',
+                                            cache_dir=cache_dir,
+                                            cache_format=cache_format)
+                testInst.custom.add(custom1, 'add')
+                testInst.load(2009, 1)
+                if i == 0:
+                    test_data = testInst.data
+            ans1 = len(custom1.calls) == 1
+            ans2 = np.all(testInst.data == test_data)
+            ans3 = np.all(testInst.data.index == test_data.index)
+            assert ans1 & ans2 & ans3
+        shutil.rmtree(cache_dir)
+
+    def test_processed_cache_keyed_by_requested_columns(self):
+        from unittest.case import SkipTest
+        import shutil
+        import tempfile
+        try:
+            import pyarrow
+        except ImportError:
+            raise SkipTest
+        cache_dir = tempfile.mkdtemp()
+        def custom1(inst):
+            return ('doubled', 2.*inst['mlt'])
+        custom1.inputs = ['mlt']
+        custom1.outputs = ['doubled']
+        def custom2(inst):
+            return ('tripled', 3.*inst['mlt'])
+        custom2.inputs = ['mlt']
+        custom2.outputs = ['tripled']
+        columns = []
+        for requested in [['doubled'], None]:
+            testInst = pysat.Instrument('pysat', 'testing', '10',
+                                        clean_level='clean',
+                                        cache_dir=cache_dir)
+            testInst.custom.add(custom1, 'add')
+            testInst.custom.add(custom2, 'add')
+            testInst.custom.requested = requested
+            testInst.load(2009, 1)
+            columns.append('tripled' in testInst.data.columns)
+        shutil.rmtree(cache_dir)
+        assert columns == [False, True]
+
+    def test_source_file_stats_of_monthly_files(self):
+        import shutil
+        import tempfile
+        data_path = tempfile.mkdtemp()
+        with open(os.path.join(data_path, 'month.txt'), 'w') as f:
+            f.write('0123456789')
+        self.testInst.files.data_path = data_path
+        self.testInst.files.files = pds.Series(['month.txt_2009-01-01'],
+                                        index=[pysat.datetime(2009,1,1)])
+        self.testInst._set_load_parameters(date=pysat.datetime(2009,1,1))
+        stats = self.testInst._source_file_stats()
+        shutil.rmtree(data_path)
+        ans1 = len(stats) == 1
+        ans2 = (stats[0][0] == 'month.txt_2009-01-01') & (stats[0][2] == 10)
+        assert ans1 & ans2
+
+    def test_processed_cache_profiles(self):
+        from unittest.case import SkipTest
+        import shutil
+        import tempfile
+        try:
+            import pyarrow
+        except ImportError:
+            raise SkipTest
+        cache_dir = tempfile.mkdtemp()
+        for i in range(2):
+            testInst = pysat.Instrument('pysat', 'testing2d', 
+                                        cache_dir=cache_dir)
+            testInst.load(2009, 1)
+            if i == 0:
+                test_data = testInst.data
+        for j in range(len(test_data)):
+            assert np.all(testInst['profiles'].iloc[j] == 
+                          test_data['profiles'].iloc[j])
+        shutil.rmtree(cache_dir)
+
+    def test_processed_cache_bad_format(self):
+        assert_raises(ValueError, pysat.Instrument, 'pysat', 'testing', 
+                      cache_format='hdf')
+
+    ############################
+    # test memory-mapped data
+    def test_memory_mapped_load(self):
+        import shutil
+        import tempfile
+        mmap_dir = tempfile.mkdtemp()
+        testInst = pysat.Instrument('pysat', 'testing', '10', 
+                                    clean_level='clean', mmap_dir=mmap_dir,
+                                    pad={'seconds': 2})
+        testInst.load(2009, 1)
+        self.testInst.pad = pds.DateOffset(seconds=2)
+        self.testInst.load(2009, 1)
+        values = testInst._next_data['mlt'].values
+        while (values is not None) and not isinstance(values, np.memmap):
+            values = values.base
+        ans1 = isinstance(values, np.memmap)
+        ans2 = np.all(testInst.data == self.testInst.data)
+        ans3 = len(testInst._scratch_files) == 0
+        shutil.rmtree(mmap_dir)
+        assert ans1 & ans2 & ans3
+
+    def test_memory_mapped_columns_share_memory(self):
+        import shutil
+        import tempfile
+        mmap_dir = tempfile.mkdtemp()
+        testInst = pysat.Instrument('pysat', 'testing', '10',
+                                    clean_level='clean', mmap_dir=mmap_dir)
+        testInst.load(2009, 1)
+        ans = []
+        for col in ['mlt', 'slt']:
+            values = testInst.data[col].values
+            mapped = values
+            while (mapped is not None) and not isinstance(mapped, np.memmap):
+                mapped = mapped.base
+            ans.append(isinstance(mapped, np.memmap) and
+                       np.shares_memory(mapped, values))
+        shutil.rmtree(mmap_dir)
+        assert np.all(ans)
+
+    ############################
+    # test support for writing profiles
+    def test_stack_profiles_equal_length(self):
+        out = self.testInst._stack_profiles(np.arange(6.), np.array([3, 3]), 3)
+        assert np.all(out == np.arange(6.).reshape((2, 3)))
+
+    def test_stack_profiles_ragged(self):
+        out = self.testInst._stack_profiles(np.arange(6.), np.array([3, 1, 2]), 3)
+        ans1 = np.all(out.compressed() == np.arange(6.))
+        ans2 = np.all(out.mask == [[False, False, False], [False, True, True],
+                                   [False, False, True]])
+        assert ans1 & ans2
+
 ### testing init functions
 
 ###### need to check with default1!!!!!                        
@@ -365,6 +668,42 @@ class TestBasics:
         out = pds.date_range(start_d, stop_d).tolist()
         assert np.all(dates == out[::-1])
 
+    def test_next_over_bounds_set_by_fname_season(self):
+        start = ['01/01/09.nofile', '02/01/09.nofile']
+        stop = ['01/02/09.nofile', '02/02/09.nofile']
+        self.testInst.bounds = (start, stop)
+        dates = []
+        for i in range(4):
+            self.testInst.next()
+            dates.append(self.testInst.date)
+        out = [pysat.datetime(2009,1,1), pysat.datetime(2009,1,2),
+               pysat.datetime(2009,2,1), pysat.datetime(2009,2,2)]
+        assert np.all(dates == out)
+
+    def test_next_after_bounds_change(self):
+        self.testInst.bounds = (pysat.datetime(2009,1,1), 
+                                pysat.datetime(2009,1,15))
+        self.testInst.next()
+        self.testInst.next()
+        self.testInst.bounds = (pysat.datetime(2009,1,1), 
+                                pysat.datetime(2009,1,15), '2D')
+        # loaded date isn't on the new iteration list
+        assert_raises(StopIteration, self.testInst.next)
+        self.testInst.load(date=pysat.datetime(2009,1,5))
+        self.testInst.next()
+        assert self.testInst.date == pysat.datetime(2009,1,7)
+
+    def test_next_by_fname_after_files_refresh(self):
+        self.testInst.bounds = ('01/01/09.nofile', '01/15/09.nofile')
+        self.testInst.next()
+        self.testInst.next()
+        self.testInst.files.refresh()
+        self.testInst.next()
+        ans1 = self.testInst.date == pysat.datetime(2009,1,3)
+        # file ids were looked up again in the refreshed list
+        ans2 = self.testInst._iter_files is self.testInst.files.files
+        assert ans1 & ans2
+
     def test_set_bounds_by_fname_season(self):
         start = ['01/01/09.nofile', '02/01/09.nofile']
         stop = ['01/03/09.nofile', '02/03/09.nofile']
@@ -591,6 +930,33 @@ class TestDataPadding():
         #print(self.testInst.data.index)
         assert (self.testInst.data.index[0] == self.testInst.date) & \
                (self.testInst.data.index[-1] == self.testInst.date + pds.DateOffset(hour=23, minutes=59,seconds=59))
+
+    def test_data_padding_buffers_unchanged(self):
+        def modify(inst):
+            inst.data['mlt'] = 0.
+        self.testInst.custom.add(modify, 'modify')
+        self.testInst.load(2009, 2)
+        self.testInst.next()
+        assert (self.testInst._prev_data['mlt'] != 0.).any()
+        assert (self.testInst._curr_data['mlt'] != 0.).any()
+
+    def test_data_padding_range_load(self):
+        start = pysat.datetime(2009,1,2,12)
+        stop = pysat.datetime(2009,1,4,12)
+        self.testInst.load(start=start, stop=stop)
+        ans1 = self.testInst.data.index[0] == start
+        ans2 = self.testInst.data.index[-1] == stop - pds.DateOffset(seconds=1)
+        ans3 = len(self.testInst.data) == 172800
+        assert ans1 & ans2 & ans3
+
+    def test_data_padding_range_load_verifyPad(self):
+        start = pysat.datetime(2009,1,2)
+        stop = pysat.datetime(2009,1,4)
+        self.testInst.load(start=start, stop=stop, verifyPad=True)
+        ans1 = self.testInst.data.index[0] == start - pds.DateOffset(minutes=5)
+        ans2 = self.testInst.data.index[-1] == stop + \
+            pds.DateOffset(minutes=4, seconds=59)
+        assert ans1 & ans2
                 
                                 
 class TestMultiFileRightDataPaddingBasics(TestDataPadding):
@@ -0,0 +1,40 @@
+"""
+tests the omni_hro instrument support functions
+"""
+import numpy as np
+import pandas as pds
+
+import pysat
+from pysat.instruments import omni_hro
+
+
+class TestTimeShift():
+    def setup(self):
+        '''Runs before every method to create a clean testing setup.'''
+        index = pds.date_range('2009-01-01', '2009-01-02 23:59', freq='1min')
+        self.testInst = pysat.Instrument()
+        self.testInst.data = pysat.DataFrame({'Vx': -400.*np.ones(len(index)),
+                                              'BSN_x': 12.*np.ones(len(index)),
+                                              'B': np.arange(len(index), 
+                                                             dtype=float)},
+                                             index=index)
+        # 191 s, truncated from 191.136
+        self.shift = pds.DateOffset(seconds=191)
+
+    def test_time_shift(self):
+        omni_hro.time_shift_to_magnetic_poles(self.testInst)
+        ans1 = self.testInst.data.index[0] == \
+            pysat.datetime(2009,1,1) + self.shift
+        ans2 = len(self.testInst.data) == 2880
+        ans3 = self.testInst.data.index.is_monotonic_increasing
+        assert ans1 & ans2 & ans3
+
+    def test_time_shift_fills_gaps(self):
+        data = self.testInst.data
+        self.testInst.data = data.drop(data.index[10:20])
+        self.testInst.data.iloc[30, 0] = np.nan
+        omni_hro.time_shift_to_magnetic_poles(self.testInst)
+        ans1 = len(self.testInst.data) == 2880
+        ans2 = np.allclose(self.testInst['B'].values[0:40], np.arange(40))
+        ans3 = not np.isnan(self.testInst['Vx']).any()
+        assert ans1 & ans2 & ans3
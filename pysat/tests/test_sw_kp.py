@@ -0,0 +1,88 @@
+"""
+tests the sw_kp instrument support functions
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pds
+
+import pysat
+from pysat.instruments import sw_kp
+
+
+class TestKpParse():
+    def setup(self):
+        '''Runs before every method to create a clean testing setup.'''
+        self.lines = [b'090101  0o 1+ 2- 3o  4+ 5- 6o 7+   23o 12 0.55',
+                      b'090102  9o 0o 0o 1+  1o 1o 1o 1o   10o  3 0.11']
+        self.footer = [b'', b'Mean   2.1', b'', b'']
+
+    def test_parse_lines(self):
+        data = sw_kp._parse_lines(self.lines)
+        ans1 = len(data) == 16
+        ans2 = data.index[0] == pysat.datetime(2009,1,1)
+        ans3 = data.index[-1] == pysat.datetime(2009,1,2,21)
+        ans4 = np.allclose(data['kp'].values[0:4], 
+                           [0., 1.+1./3., 2.-1./3., 3.])
+        assert ans1 & ans2 & ans3 & ans4
+
+    def test_parse_lines_year_break(self):
+        data = sw_kp._parse_lines([b'950301' + self.lines[0][6:]])
+        assert data.index[0] == pysat.datetime(1995,3,1)
+
+    def test_read_month(self):
+        handle, fname = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as f:
+            f.write(b'\n'.join(self.lines + self.footer) + b'\n')
+        data = sw_kp._read_month(fname)
+        os.remove(fname)
+        ans1 = len(data) == 16
+        ans2 = data['kp'].iloc[8] == 9.
+        assert ans1 & ans2
+
+
+class TestFilterGeoquiet():
+    def setup(self):
+        '''Runs before every method to create a clean testing setup.'''
+        index = pds.date_range('2009-01-01', '2009-01-03 21:00', freq='3H')
+        self.kp = pysat.Instrument()
+        self.kp.data = pysat.DataFrame({'kp': np.zeros(len(index))}, 
+                                       index=index)
+        self.sat = pysat.Instrument()
+        index = pds.date_range('2009-01-02', '2009-01-02 23:59', freq='1min')
+        self.sat.data = pysat.DataFrame({'dummy': np.ones(len(index))}, 
+                                        index=index)
+        self.sat.date = pysat.datetime(2009,1,2)
+
+    def test_filter_geoquiet_quiet(self):
+        sw_kp.filter_geoquiet(self.sat, kpData=self.kp)
+        assert len(self.sat.data) == 1440
+
+    def test_filter_geoquiet_merged_intervals(self):
+        # disturbed the day before, filter carries into the day
+        self.kp.data.iloc[7, 0] = 5.
+        # overlapping disturbed intervals, 12:00 through 19:00
+        self.kp.data.iloc[12, 0] = 5.
+        self.kp.data.iloc[13, 0] = 5.
+        sw_kp.filter_geoquiet(self.sat, filterTime=4, kpData=self.kp)
+        index = self.sat.data.index
+        ans1 = index[0] == pysat.datetime(2009,1,2,1,1)
+        ans2 = pysat.datetime(2009,1,2,11,59) in index
+        ans3 = pysat.datetime(2009,1,2,16) not in index
+        ans4 = pysat.datetime(2009,1,2,19,1) in index
+        ans5 = len(index) == 1440 - 61 - 421
+        assert ans1 & ans2 & ans3 & ans4 & ans5
+
+    def test_kp_block_loaded_once_near_end_of_record(self):
+        # Kp ends before the requested dates, so no load covers them
+        loads = []
+        class KpRecord(object):
+            def load(self, start=None, stop=None):
+                loads.append((start, stop))
+        block = sw_kp._KpBlock(KpRecord())
+        for day in range(2, 6):
+            block.load(pysat.datetime(2009,1,day))
+        ans1 = len(loads) == 1
+        ans2 = loads[0][0] == pysat.datetime(2009,1,1)
+        assert ans1 & ans2
@@ -37,6 +37,35 @@ def test_getyrdoy_leap_year():
     yr, doy = pysat.utils.getyrdoy(date)
     assert ((yr == 2008) & (doy == 366)) 
 
+#########
+## datetime index tests
+def test_create_datetime_index():
+    '''Test index creation from year, month, day, and float seconds'''
+    index = pysat.utils.create_datetime_index(year=np.array([2009, 2012]),
+                                              month=np.array([1, 2]),
+                                              day=np.array([31, 29]),
+                                              uts=np.array([0.5, 86399.]))
+    assert np.all(index == [pds.datetime(2009,1,31,0,0,0,500000),
+                            pds.datetime(2012,2,29,23,59,59)])
+
+def test_create_datetime_index_doy():
+    '''Test index creation from year and day of year'''
+    index = pysat.utils.create_datetime_index(year=np.array([2008, 2009]),
+                                              day=np.array([366, 32]),
+                                              uts=np.array([1, 2]))
+    assert np.all(index == [pds.datetime(2008,12,31,0,0,1),
+                            pds.datetime(2009,2,1,0,0,2)])
+
+def test_create_datetime_index_ns():
+    '''Test index creation from integer nanoseconds is exact'''
+    ut_ns = np.array([1, 86399999999999], dtype=np.int64)
+    index = pysat.utils.create_datetime_index(year=np.array([2009, 2009]),
+                                              month=np.array([1, 1]),
+                                              day=np.array([1, 1]),
+                                              ut_ns=ut_ns)
+    start = pds.Timestamp(pds.datetime(2009,1,1)).value
+    assert np.all(index.values.view(np.int64) == start + ut_ns)
+
 ####################3
 # test netCDF fexport ile support
 
@@ -134,6 +163,268 @@ class TestBasics:
         test_inst.data.drop('profiles', inplace=True, axis=1)    
         assert(np.all((test_inst.data == loaded_inst).all()))
 
+    def test_writing_and_reading_netcdf4_multiple_files(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfiles = []
+        frames = []
+        for day in [1, 2]:
+            outfiles.append(os.path.join(self.testInst.files.data_path, 
+                                         'test_ncdf_%i.nc' % day))
+            self.testInst.load(2009, day)
+            self.testInst.to_netcdf4(outfiles[-1])
+            frames.append(self.testInst.data)
+        test_data = pds.concat(frames)
+        
+        for nthreads in [None, 2]:
+            loaded_inst, meta = pysat.utils.load_netcdf4(outfiles, 
+                                                         nthreads=nthreads)
+            assert len(loaded_inst) == len(test_data)
+            for key in test_data.columns:
+                assert(np.all(test_data[key] == loaded_inst[key]))
+
+    def test_writing_and_reading_netcdf4_selection(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path, 'test_ncdf.nc')
+        self.testInst.load(2009,1)
+        self.testInst.to_netcdf4(outfile)
+        start = pysat.datetime(2009,1,1,1)
+        stop = pysat.datetime(2009,1,1,2)
+        loaded_inst, meta = pysat.utils.load_netcdf4(outfile, 
+                                                     variables=['mlt', 'slt'],
+                                                     start=start, stop=stop)
+        test_data = self.testInst[start:stop - pds.DateOffset(seconds=1), 
+                                  ['mlt', 'slt']]
+        ans1 = list(loaded_inst.columns) == ['mlt', 'slt']
+        ans2 = np.all(loaded_inst.index == test_data.index)
+        ans3 = np.all(loaded_inst == test_data)
+        assert ans1 & ans2 & ans3
+
+    def test_writing_and_reading_netcdf4_compressed(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path, 'test_ncdf.nc')
+        self.testInst.load(2009,1)
+        self.testInst.to_netcdf4(outfile, zlib=True, complevel=1,
+                                 least_significant_digit={'mlt': 3})
+        with netCDF4.Dataset(outfile) as ncfile:
+            filters = ncfile.variables['slt'].filters()
+            chunks = ncfile.variables['slt'].chunking()
+        loaded_inst, meta = pysat.utils.load_netcdf4(outfile)
+        ans1 = filters['zlib'] & filters['shuffle']
+        ans2 = chunks == [3600]
+        ans3 = np.all(loaded_inst['slt'] == self.testInst['slt'])
+        ans4 = np.allclose(loaded_inst['mlt'], self.testInst['mlt'], 
+                           atol=1.E-3)
+        assert ans1 & ans2 & ans3 & ans4
+
+    def test_streaming_netcdf4_writer(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path, 'test_ncdf.nc')
+        self.testInst.bounds = (pysat.datetime(2009,1,1), 
+                                pysat.datetime(2009,1,2))
+        data = []
+        with pysat.NetCDF4Writer(outfile) as writer:
+            for inst in self.testInst:
+                writer.write(inst)
+                data.append(inst.data)
+        test_data = pds.concat(data)
+        loaded_inst, meta = pysat.utils.load_netcdf4(outfile)
+        ans1 = writer.files == [outfile]
+        ans2 = np.all(loaded_inst.index == test_data.index)
+        ans3 = np.all(loaded_inst['mlt'] == test_data['mlt'])
+        assert ans1 & ans2 & ans3
+
+    def test_streaming_netcdf4_writer_rolls_by_period(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path, 
+                               'test_ncdf_{hour:02d}.nc')
+        self.testInst.load(2009,1)
+        with pysat.NetCDF4Writer(outfile, period={'hours': 12}) as writer:
+            writer.write(self.testInst)
+        loaded_inst, meta = pysat.utils.load_netcdf4(writer.files[1])
+        ans1 = len(writer.files) == 2
+        ans2 = np.all(loaded_inst.index == self.testInst.data.index[43200:])
+        assert ans1 & ans2
+
+    def test_streaming_netcdf4_writer_longer_profiles(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        test_inst = pysat.Instrument('pysat', 'testing2d')
+        prep_dir(test_inst)
+        test_inst.load(2009,1)
+        test_inst.data = test_inst.data.iloc[0:20]
+        profiles = [frame.iloc[0:(2 if i < 10 else 5)]
+                    for i, frame in enumerate(test_inst['profiles'])]
+        test_inst.data['profiles'] = pds.Series(profiles,
+                                                index=test_inst.data.index)
+        data = test_inst.data
+        for max_len, num_files in [(None, 2), (5, 1)]:
+            outfile = os.path.join(test_inst.files.data_path,
+                                   'test_ncdf_{num:03d}.nc')
+            with pysat.NetCDF4Writer(outfile,
+                                     max_profile_length=max_len) as writer:
+                for i in [0, 10]:
+                    test_inst.data = data.iloc[i:i+10]
+                    writer.write(test_inst)
+            assert len(writer.files) == num_files
+            loaded = [pysat.utils.load_netcdf4(fname)[0]['profiles']
+                      for fname in writer.files]
+            loaded = pds.concat(loaded)
+            for frame1, frame2 in zip(profiles, loaded):
+                assert len(frame1) == len(frame2)
+
+    def test_streaming_netcdf4_writer_rolls_by_size(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path,
+                               'test_ncdf_{year:04d}_{num:03d}.nc')
+        self.testInst.bounds = (pysat.datetime(2009,1,1),
+                                pysat.datetime(2009,1,3))
+        data = []
+        with pysat.NetCDF4Writer(outfile, max_bytes=1) as writer:
+            for inst in self.testInst:
+                writer.write(inst)
+                data.append(inst.data)
+        test_data = pds.concat(data)
+        loaded = [pysat.utils.load_netcdf4(fname)[0] 
+                  for fname in writer.files]
+        loaded = pds.concat(loaded)
+        ans1 = len(set(writer.files)) == 3
+        ans2 = np.all(loaded.index == test_data.index)
+        ans3 = np.all(loaded['mlt'] == test_data['mlt'])
+        assert ans1 & ans2 & ans3
+
+    def test_streaming_netcdf4_writer_needs_format_fields(self):
+        assert_raises(ValueError, pysat.NetCDF4Writer, 'test.nc', 
+                      period={'days': 1})
+        assert_raises(ValueError, pysat.NetCDF4Writer, 'test_{day:02d}.nc', 
+                      max_bytes=1000)
+
+    def test_streaming_netcdf4_writer_wont_overwrite(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path,
+                               'test_ncdf_{hour:02d}.nc')
+        self.testInst.load(2009,1)
+        self.testInst.data = self.testInst.data.iloc[0:10]
+        writer = pysat.NetCDF4Writer(outfile, period={'days': 1})
+        writer.write(self.testInst)
+        self.testInst.data.index = self.testInst.data.index + \
+            pds.DateOffset(days=1)
+        assert_raises(ValueError, writer.write, self.testInst)
+        writer.close()
+
+    def test_writing_and_reading_netcdf4_strings(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        prep_dir(self.testInst)
+        outfile = os.path.join(self.testInst.files.data_path, 'test_ncdf.nc')
+        self.testInst.load(2009,1)
+        self.testInst['string_dummy'] = ['other', 'test']*43200
+        for encoding in ['categorical', 'char']:
+            self.testInst.to_netcdf4(outfile, string_encoding=encoding)
+            loaded_inst, meta = pysat.utils.load_netcdf4(outfile)
+            for key in ['string_dummy', 'unicode_dummy']:
+                assert np.all(loaded_inst[key] == self.testInst[key])
+                is_cat = loaded_inst[key].dtype.name == 'category'
+                assert is_cat == (encoding == 'categorical')
+
+    def test_netcdf4_time_codecs_are_exact(self):
+        times = pds.date_range(pysat.datetime(2009,1,1), periods=100, 
+                               freq='1234567U').values
+        encoded = self.testInst._netcdf4_encode_times(times, 'NETCDF4')
+        decoded = pysat.utils._netcdf4_time_to_ns(encoded, 'NETCDF4')
+        assert np.all(decoded.view('datetime64[ns]') == times)
+
+    def test_netcdf4_time_decoding_masked_is_nat(self):
+        values = np.ma.masked_array([1, 2, 3], mask=[False, True, False])
+        decoded = pysat.utils._netcdf4_time_to_ns(values, 'NETCDF4',
+                                                  'Microseconds since 1970')
+        ans1 = np.all(decoded[[0, 2]] == [1000, 3000])
+        ans2 = decoded.view('i8')[1] == np.iinfo('i8').min
+        assert ans1 & ans2
+
+    def test_writing_and_reading_netcdf4_dense_2d(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        test_inst = pysat.Instrument('pysat', 'testing2d')    
+        prep_dir(test_inst)
+        outfile = os.path.join(test_inst.files.data_path, 'test_ncdf.nc')
+        test_inst.load(2009,1)
+        test_inst.to_netcdf4(outfile)
+        loaded_inst, meta, twod = pysat.utils.load_netcdf4_dense_2d(outfile)
+        
+        ans1 = 'profiles' not in loaded_inst.columns
+        ans2 = len(twod['profiles']) == 50*len(test_inst.data)
+        time = test_inst.data.index[5]
+        frame = twod['profiles'].loc[time]
+        ans3 = np.all(frame['density'].values == test_inst[time, 'profiles']['density'].values)
+        assert ans1 & ans2 & ans3
+
+    def test_writing_and_reading_netcdf4_ragged_profiles(self):
+        from unittest.case import SkipTest
+        try:
+            import netCDF4
+        except ImportError:
+            raise SkipTest
+        test_inst = pysat.Instrument('pysat', 'testing2d')
+        prep_dir(test_inst)
+        outfile = os.path.join(test_inst.files.data_path, 'test_ncdf.nc')
+        test_inst.load(2009,1)
+        test_inst.data = test_inst.data.iloc[0:20]
+        profiles = [frame.iloc[0:(i % 5) + 1]
+                    for i, frame in enumerate(test_inst['profiles'])]
+        test_inst.data['profiles'] = pds.Series(profiles,
+                                                index=test_inst.data.index)
+        test_inst.to_netcdf4(outfile)
+        loaded_inst, meta = pysat.utils.load_netcdf4(outfile)
+        for frame1, frame2 in zip(test_inst['profiles'],
+                                  loaded_inst['profiles']):
+            assert len(frame1) == len(frame2)
+            assert np.all(frame1['density'].values == frame2['density'].values)
+        loaded_inst, meta, twod = pysat.utils.load_netcdf4_dense_2d(outfile)
+        assert len(twod['profiles']) == sum([len(frame) for frame in profiles])
 
     # def test_basic_writing_and_reading_netcdf4_multiple_formats(self):
     #     # create a bunch of files by year and doy
@@ -4,6 +4,8 @@ from __future__ import absolute_import
 import pandas as pds
 import numpy as np
 import copy
+import collections
+from multiprocessing.pool import ThreadPool
 # python 2/3 compatibility
 try:
     basestring
@@ -77,7 +79,9 @@ def set_data_dir(path=None, store=None):
         raise ValueError('Path does not lead to a valid directory.')
         
 
-def load_netcdf4(fnames=None, strict_meta=False, format=None, time_name='epoch'): #, index_label=None,
+def load_netcdf4(fnames=None, strict_meta=False, format=None, time_name='epoch',
+                 nthreads=None, variables=None, start=None,
+                 stop=None): #, index_label=None,
                     # unix_time=False, **kwargs):
     """Load netCDF-3/4 file produced by pysat.
     
@@ -90,12 +94,84 @@ def load_netcdf4(fnames=None, strict_meta=False, format=None, time_name='epoch')
     format : string
         format keyword passed to netCDF4 routine
         NETCDF3_CLASSIC, NETCDF3_64BIT, NETCDF4_CLASSIC, and NETCDF4
+    nthreads : int or NoneType
+        number of threads used to read files concurrently. Requires
+        netCDF/HDF5 libraries built to be thread-safe. (default=None)
+    variables : list of strings or NoneType
+        names of variables to load. 2D data is selected using the
+        name of the object. If None, all variables are loaded. 
+        (default=None)
+    start : datetime or NoneType
+        only load data at or after start (default=None)
+    stop : datetime or NoneType
+        only load data before stop, exclusive (default=None)
      
+    Returns
+    -------
+    out : pandas.DataFrame
+        loaded data, indexed by time
+    mdata : pysat.Meta
+        loaded metadata
+        
+    Note
+    ----
+    The size and type of every variable across all files is determined
+    first so the combined output may be allocated once and filled
+    file by file. Metadata is taken from the first file, unless 
+    strict_meta is True.
+    
+    When start or stop are provided the time variable in each file is
+    searched and only the matching range is read from every variable.
+        
     """
                     
+    out, mdata, twod = _load_netcdf4(fnames, strict_meta, format, time_name,
+                                     False, nthreads, variables, start, stop)
+    for key in twod.keys():
+        out[key] = twod[key]
+    return out, mdata
+
+
+def load_netcdf4_dense_2d(fnames=None, strict_meta=False, format=None,
+                          time_name='epoch', nthreads=None, variables=None,
+                          start=None, stop=None):
+    """Load netCDF-3/4 file produced by pysat, keeping 2D data separate.
+    
+    Parameters are the same as load_netcdf4.
+     
+    Returns
+    -------
+    out : pandas.DataFrame
+        loaded 1D data, indexed by time
+    mdata : pysat.Meta
+        loaded metadata
+    twod : dict of pandas.DataFrames
+        2D data keyed by object name. Rather than a DataFrame for each 
+        time, each object is one DataFrame indexed by (time, profile 
+        index). Per-time DataFrames may be obtained when needed via 
+        .loc[time].
+        
+    """
+    return _load_netcdf4(fnames, strict_meta, format, time_name, True, 
+                         nthreads, variables, start, stop)
+
+
+def _load_netcdf4(fnames, strict_meta, format, time_name, dense_2d, nthreads,
+                  variables, start, stop):
+    """Load netCDF files, see load_netcdf4.
+
+    Returns
+    -------
+    out : pandas.DataFrame
+        loaded 1D data, indexed by time
+    mdata : pysat.Meta
+        loaded metadata
+    twod : dict
+        2D data keyed by object name, an object array with a DataFrame
+        for each time or, if dense_2d, a single DataFrame
+        
+    """
     import netCDF4
-    import string
-    import pysat
 
     if fnames is None:
         raise ValueError("Must supply a filename/list of filenames")
@@ -107,12 +183,155 @@ def load_netcdf4(fnames=None, strict_meta=False, format=None, time_name='epoch')
     else:
         format = format.upper()
 
-    saved_mdata = None
-    running_idx = 0
-    running_store=[]
-    two_d_keys = []; two_d_dims = [];
+    # time limits in nanoseconds, consistent with loaded time index
+    if start is not None:
+        start = pds.Timestamp(start).value
+    if stop is not None:
+        stop = pds.Timestamp(stop).value
+
+    # determine the number of samples and the 1D variables in each file
+    num_samples = []
+    file_slices = []
+    var_types = collections.OrderedDict()
+    var_count = {}
+    categorical = []
     for fname in fnames:
         with netCDF4.Dataset(fname, mode='r', format=format) as data:
+            lo = 0
+            hi = data.variables[time_name].shape[0]
+            if (start is not None) or (stop is not None):
+                # find range of samples within time limits
+                time_var = data.variables[time_name]
+                file_times = _netcdf4_time_to_ns(time_var[:], format,
+                                                 getattr(time_var, 'units', None))
+                if start is not None:
+                    lo = np.searchsorted(file_times, start, side='left')
+                if stop is not None:
+                    hi = max(lo, np.searchsorted(file_times, stop, side='left'))
+            file_slices.append((lo, hi))
+            num_samples.append(hi - lo)
+            time_dim = data.variables[time_name].dimensions[0]
+            for key in data.variables.keys():
+                var = data.variables[key]
+                if (variables is not None) and (key not in variables):
+                    continue
+                if 'pysat_profile_lengths' in var.ncattrs():
+                    # stored with the 2D data it describes
+                    continue
+                string_kind = _netcdf4_string_kind(var, time_dim)
+                if ((len(var.dimensions) == 1) or (string_kind == 'char')) \
+                        and (key != time_name):
+                    if key not in var_types:
+                        if string_kind is None:
+                            var_types[key] = var.dtype
+                        else:
+                            var_types[key] = np.dtype('O')
+                        var_count[key] = 0
+                    var_count[key] += 1
+                    if (string_kind == 'categorical') and \
+                            (key not in categorical):
+                        categorical.append(key)
+    starts = np.cumsum([0] + num_samples)
+    total = starts[-1]
+
+    # allocate output for all files
+    out_vars = collections.OrderedDict()
+    for key in var_types.keys():
+        dtype = var_types[key]
+        if not isinstance(dtype, np.dtype):
+            # variable length strings
+            dtype = np.dtype('O')
+        if var_count[key] < len(fnames):
+            # variable isn't present in every file, missing data is NaN
+            if dtype.kind in ['i', 'u', 'f']:
+                out_vars[key] = np.full(total, np.nan)
+            else:
+                out_vars[key] = np.full(total, None, dtype=np.dtype('O'))
+        else:
+            out_vars[key] = np.empty(total, dtype=dtype)
+    times = np.empty(total, dtype=np.int64)
+
+    # fill output file by file
+    args = [(fname, format, time_name, dense_2d, out_vars, times, loc,
+             (i == 0) or strict_meta, file_slice, variables)
+            for i, (fname, loc, file_slice) in enumerate(zip(fnames, 
+                                                             starts[:-1],
+                                                             file_slices))]
+    if (nthreads is not None) and (len(fnames) > 1):
+        pool = ThreadPool(min(nthreads, len(fnames)))
+        try:
+            results = pool.map(_load_netcdf4_file, args)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_load_netcdf4_file(arg) for arg in args]
+
+    # collect metadata and 2D data across files
+    mdata = None
+    running_twod = collections.OrderedDict()
+    for i, (file_meta, twod) in enumerate(results):
+        if mdata is None:
+            mdata = file_meta
+        elif strict_meta:
+            if (file_meta != mdata):
+                raise ValueError('Metadata across filenames is not the same.')
+        for key in twod.keys():
+            if dense_2d:
+                if key not in running_twod:
+                    running_twod[key] = []
+                running_twod[key].append(twod[key])
+            else:
+                if key not in running_twod:
+                    running_twod[key] = np.empty(total, dtype=np.dtype('O'))
+                for j, frame in enumerate(twod[key]):
+                    running_twod[key][starts[i] + j] = frame
+
+    # combine all of the data loaded across files together
+    index = pds.DatetimeIndex(times.view('datetime64[ns]'), name=time_name)
+    out = pds.DataFrame(out_vars, index=index, columns=list(out_vars.keys()))
+    for key in categorical:
+        out[key] = out[key].astype('category')
+    twod = collections.OrderedDict()
+    for key in running_twod.keys():
+        if dense_2d:
+            twod[key] = pds.concat(running_twod[key], axis=0)
+        else:
+            twod[key] = running_twod[key]
+    return out, mdata, twod
+
+
+def _load_netcdf4_file(args):
+    """Load a single netCDF file produced by pysat into preallocated output.
+    
+    Parameters
+    ----------
+    args : tuple
+        (fname, format, time_name, dense_2d, out_vars, times, start, 
+        load_meta, file_slice, variables), see load_netcdf4. Samples 
+        within file_slice, a (first, last+1) tuple, are read. 1D variables 
+        are stored into out_vars and times beginning at location start. 
+        Metadata is only built if load_meta is True.
+        
+    Returns
+    -------
+    mdata : pysat.Meta or NoneType
+        metadata for file
+    twod : dict
+        2D data keyed by object name. A list of DataFrames, one per time,
+        or a single DataFrame indexed by time and profile index if dense_2d.
+        
+    """
+    import netCDF4
+    import pysat
+
+    (fname, format, time_name, dense_2d, out_vars, times, start, load_meta,
+     file_slice, variables) = args
+    lo, hi = file_slice
+    twod = {}
+    mdata = None
+    with netCDF4.Dataset(fname, mode='r', format=format) as data:
+        if load_meta:
             # build up dictionary with all global ncattrs
             # and add those attributes to a pysat meta object
             ncattrsList = data.ncattrs()
@@ -122,152 +341,294 @@ def load_netcdf4(fnames=None, strict_meta=False, format=None, time_name='epoch')
                     mdata.__setattr__(d+'_', data.getncattr(d))
                 else:
                     mdata.__setattr__(d, data.getncattr(d))
-               
-            # loadup all of the variables in the netCDF
-            loadedVars = {}
-            for key in data.variables.keys():
-                # load up metadata
-                # from here group unique dimensions and act accordingly, 1D, 2D, 3D  
-                if len(data.variables[key].dimensions) == 1:
-                    # assuming basic time dimension
-                    loadedVars[key] = data.variables[key][:] 
-                    if key != time_name:
+
+        # prepare dataframe index for this netcdf file
+        time_var = data.variables[time_name][lo:hi]
+        stop = start + len(time_var)
+        # convert from GPS seconds to seconds used in pandas (unix time, no leap)
+        #time_var = convert_gps_to_unix_seconds(time_var)
+        times[start:stop] = _netcdf4_time_to_ns(time_var, format,
+                                                getattr(data.variables[time_name],
+                                                        'units', None))
+           
+        # loadup all of the variables in the netCDF
+        two_d_keys = []; two_d_dims = [];
+        profile_lengths = {}
+        time_dim = data.variables[time_name].dimensions[0]
+        for key in data.variables.keys():
+            if 'pysat_profile_lengths' in data.variables[key].ncattrs():
+                # samples in each padded profile, keyed by dimension
+                dim_name = data.variables[key].getncattr('pysat_profile_lengths')
+                lengths = np.ma.getdata(data.variables[key][lo:hi])
+                profile_lengths[dim_name] = lengths.astype(np.int64)
+                continue
+            string_kind = _netcdf4_string_kind(data.variables[key], time_dim)
+            if string_kind == 'table':
+                # lookup table for categorical strings, used below
+                continue
+            # load up metadata
+            # from here group unique dimensions and act accordingly, 1D, 2D, 3D  
+            if (len(data.variables[key].dimensions) == 1) or \
+                    (string_kind == 'char'):
+                # assuming basic time dimension
+                if key not in out_vars:
+                    # variable not requested
+                    continue
+                if key != time_name:
+                    if string_kind is not None:
+                        values = _netcdf4_read_strings(data, key, string_kind,
+                                                       lo, hi)
+                    else:
+                        values = data.variables[key][lo:hi]
+                    if np.ma.isMaskedArray(values):
+                        if values.dtype.kind == 'f':
+                            values = values.filled(np.nan)
+                        else:
+                            values = values.data
+                    out_vars[key][start:stop] = values
+                    if load_meta:
                         # load up metadata
                         meta_dict = {}
                         for nc_key in data.variables[key].ncattrs():
                             meta_dict[nc_key] = data.variables[key].getncattr(nc_key)
+                        meta_dict.pop('pysat_categories', None)
                         mdata[key] = meta_dict
 
-                if len(data.variables[key].dimensions) == 2:
-                    # part of dataframe within dataframe
-                    two_d_keys.append(key)
-                    two_d_dims.append(data.variables[key].dimensions)
-                    
-            # we now have a list of keys that need to go into a dataframe,
-            # could be more than one, collect unique dimensions for 2D keys
-            for dim in set(two_d_dims):
-                # get the name of the final data column
-                # dimension naming follows name_dim_number, 
-                # pull out name by finding last _ and tracking back
-                obj_key_name = dim[1][ : -dim[1][::-1].find('_')-11] #[ : -str.find(dim[1][::-1], '_')-5]
-                # collect variable names associated with object
-                obj_var_keys = []
-                # place to collect clean names without redundant naming scheme scheme
-                clean_var_keys = []
-                for tkey, tdim in zip(two_d_keys, two_d_dims):
-                    if tdim == dim:
-                        obj_var_keys.append(tkey)
-                        # try to clean variable name based on to_netcdf name mangling
-                        # break off leading 'rpa_' from variable name if 
-                        # the 2D dimension label (obj_key_name) was 'rpa'
-                        clean_var_keys.append(tkey.split(obj_key_name+'_')[-1])
-
-                # figure out how to index this data, it could provide its own
-                # index - or we may have to create simple integer based DataFrame access
-                # if the dimension is stored as its own variable then use that info for index
-                if (obj_key_name+'_dimension_1') in obj_var_keys:
-                    # string used to indentify variable in data.variables, will be used as an index 
-                    # the obj_key_name part has been stripped off
-                    index_key_name = 'dimension_1' #'samples'
-                    # if the object index uses UNIX time, process into datetime index  
-                    if data.variables[obj_key_name+'_dimension_1'].long_name == 'UNIX time':
-                        # name to be used in DataFrame index
-                        index_name = 'epoch'
-                        time_index_flag = True
-                    else:
-                        time_index_flag = False
-                        # label to be used in DataFrame index
-                        index_name = data.variables[obj_key_name+'_dimension_1'].long_name
+            elif len(data.variables[key].dimensions) == 2:
+                # part of dataframe within dataframe
+                two_d_keys.append(key)
+                two_d_dims.append(data.variables[key].dimensions)
+                
+        # we now have a list of keys that need to go into a dataframe,
+        # could be more than one, collect unique dimensions for 2D keys
+        for dim in set(two_d_dims):
+            # get the name of the final data column
+            # dimension naming follows name_dim_number, 
+            # pull out name by finding last _ and tracking back
+            obj_key_name = dim[1][ : -dim[1][::-1].find('_')-11] #[ : -str.find(dim[1][::-1], '_')-5]
+            # collect variable names associated with object
+            obj_var_keys = []
+            # place to collect clean names without redundant naming scheme scheme
+            clean_var_keys = []
+            for tkey, tdim in zip(two_d_keys, two_d_dims):
+                if tdim == dim:
+                    obj_var_keys.append(tkey)
+                    # try to clean variable name based on to_netcdf name mangling
+                    # break off leading 'rpa_' from variable name if 
+                    # the 2D dimension label (obj_key_name) was 'rpa'
+                    clean_var_keys.append(tkey.split(obj_key_name+'_')[-1])
+            if (variables is not None) and (obj_key_name not in variables):
+                # object not requested
+                continue
+
+            # figure out how to index this data, it could provide its own
+            # index - or we may have to create simple integer based DataFrame access
+            # if the dimension is stored as its own variable then use that info for index
+            if (obj_key_name+'_dimension_1') in obj_var_keys:
+                # string used to indentify variable in data.variables, will be used as an index 
+                # the obj_key_name part has been stripped off
+                index_key_name = 'dimension_1' #'samples'
+                # if the object index uses UNIX time, process into datetime index  
+                if data.variables[obj_key_name+'_dimension_1'].long_name == 'UNIX time':
+                    # name to be used in DataFrame index
+                    index_name = 'epoch'
+                    time_index_flag = True
                 else:
-                    # dimension is not itself a variable
-                    index_key_name  = None                
-                              
-                # iterate over all of the variables for given dimensions
-                # iterate over all variables with this dimension and store data
-                # data storage, whole shebang
-                loop_dict = {}
-                # list holds a series of slices, parsed from dict above
-                loop_list = []
-                # and pull out metadata
-                dim_meta_data = pysat.Meta()
-                for key, clean_key in zip(obj_var_keys, clean_var_keys):
-                    # data
-                    loop_dict[clean_key] = data.variables[key][:,:].flatten(order='C')
+                    time_index_flag = False
+                    # label to be used in DataFrame index
+                    index_name = data.variables[obj_key_name+'_dimension_1'].long_name
+            else:
+                # dimension is not itself a variable
+                index_key_name  = None                
+                time_index_flag = False
+                          
+            # iterate over all of the variables for given dimensions
+            # iterate over all variables with this dimension and store data
+            # data storage, whole shebang
+            loop_dict = {}
+            # and pull out metadata
+            dim_meta_data = pysat.Meta()
+            for key, clean_key in zip(obj_var_keys, clean_var_keys):
+                # data, padded values are replaced with NaN
+                values = data.variables[key][lo:hi, :]
+                if time_index_flag and (clean_key == index_key_name):
+                    # exact conversion to datetimes, padded values are NaT
+                    units = getattr(data.variables[key], 'units', None)
+                    values = _netcdf4_time_to_ns(values, format, units)
+                    values = values.view('datetime64[ns]')
+                elif np.ma.isMaskedArray(values):
+                    if values.dtype.kind == 'f':
+                        values = values.filled(np.nan)
+                    else:
+                        values = values.data
+                loop_dict[clean_key] = values
+                if load_meta:
                     # store attributes in metadata
                     meta_dict = {}
                     for nc_key in data.variables[key].ncattrs():
                         meta_dict[nc_key] = data.variables[key].getncattr(nc_key)
                     dim_meta_data[clean_key] = meta_dict
+            if load_meta:
                 mdata[obj_key_name] = dim_meta_data    
-                
-                ## iterate over all variables with this dimension and store data
-                #loop_list = []
-                ## make a dict of all flattened variables
-                #loop_dict = {}
-                #for key, clean_key in zip(obj_var_keys, clean_var_keys):
-                #    loop_dict[clean_key] = data.variables[key][:,:].flatten(order='C')
-
-                # number of values in time
-                loop_lim = data.variables[obj_var_keys[0]].shape[0]
-                # number of values per time
-                step_size = len(data.variables[obj_var_keys[0]][0,:])
-                # check if there is an index we should use
-                if not (index_key_name is None):
-                    # an index was found
-                    time_var = loop_dict.pop(index_key_name)
-                    if time_index_flag:
-                        # create datetime index from data
-                        if format == 'NETCDF4':
-                            time_var = pds.to_datetime(1E3*time_var)
-                        else:
-                            time_var = pds.to_datetime(1E6*time_var)
-                    new_index = time_var
-                    new_index_name = index_name
-                else:
-                    # using integer indexing
-                    new_index = np.arange(loop_lim*step_size) % step_size
-                    new_index_name = 'index'
-                # load all data into frame
-                loop_frame = pds.DataFrame(loop_dict, columns=clean_var_keys)
-                # print (loop_frame.columns)
-                del loop_frame['dimension_1']
-                # break massive frame into bunch of smaller frames
-                for i in np.arange(loop_lim):
-                    loop_list.append(loop_frame.iloc[step_size*i:step_size*(i+1),:])
-                    loop_list[-1].index = new_index[step_size*i:step_size*(i+1)]
-                    loop_list[-1].index.name = new_index_name
-                        
-                # add 2D object data, all based on a unique dimension within netCDF,
-                # to loaded data dictionary
-                loadedVars[obj_key_name] = loop_list
-                del loop_list
-                
-            # prepare dataframe index for this netcdf file
-            time_var = loadedVars.pop(time_name)
 
-            # convert from GPS seconds to seconds used in pandas (unix time, no leap)
-            #time_var = convert_gps_to_unix_seconds(time_var)
-            if format == 'NETCDF4':
-                loadedVars[time_name] = pds.to_datetime((1E3*time_var).astype(int))
+            # number of values in time
+            loop_lim = hi - lo
+            # number of values per time
+            step_size = data.variables[obj_var_keys[0]].shape[1]
+            # check if there is an index we should use
+            if not (index_key_name is None):
+                # an index was found
+                # times already converted to datetimes
+                new_index = loop_dict.pop(index_key_name)
+                new_index_name = index_name
+            else:
+                # using integer indexing
+                new_index = np.tile(np.arange(step_size), (loop_lim, 1))
+                new_index_name = 'index'
+            columns = [key for key in clean_var_keys if key in loop_dict]
+            # profiles were padded to the longest one when written, files
+            # without stored lengths are used as is
+            lengths = profile_lengths.get(dim[1])
+            if lengths is None:
+                lengths = np.full(loop_lim, step_size, dtype=np.int64)
+
+            if dense_2d:
+                # one frame for all times, indexed by time and profile index
+                file_times = pds.DatetimeIndex(times[start:stop].view('datetime64[ns]'))
+                keep = (np.arange(step_size)[np.newaxis, :] < 
+                        lengths[:, np.newaxis]).flatten()
+                index = pds.MultiIndex.from_arrays([np.repeat(file_times, lengths),
+                                                    new_index.flatten()[keep]],
+                                                   names=[time_name, new_index_name])
+                twod[obj_key_name] = pds.DataFrame(dict([(key, loop_dict[key].flatten()[keep]) 
+                                                         for key in columns]),
+                                                   index=index, columns=columns)
+                continue
+
+            # break 2D blocks into a frame for each time
+            # no slicing of a large flattened frame required
+            dtypes = set([loop_dict[key].dtype for key in columns])
+            if (len(columns) > 0) and (len(dtypes) == 1):
+                # homogenous data, frames are views into a single 3D block
+                block = np.dstack([loop_dict[key] for key in columns])
+                loop_list = [pds.DataFrame(block[i, :lengths[i]], columns=columns,
+                                           index=pds.Index(new_index[i, :lengths[i]], 
+                                                           name=new_index_name))
+                             for i in np.arange(loop_lim)]
             else:
-                loadedVars[time_name] = pds.to_datetime((time_var*1E6).astype(int))
-            #loadedVars[time_name] = pds.to_datetime((time_var*1E6).astype(int))
-            
-            running_store.append(loadedVars)
-            running_idx += len(loadedVars[time_name])
-
-            if strict_meta:
-                if saved_mdata is None:
-                    saved_mdata = copy.deepcopy(mdata)
-                elif (mdata != saved_mdata):
-                    raise ValueError('Metadata across filenames is not the same.')
+                loop_list = [pds.DataFrame(dict([(key, loop_dict[key][i, :lengths[i]]) 
+                                                 for key in columns]),
+                                           columns=columns,
+                                           index=pds.Index(new_index[i, :lengths[i]],
+                                                           name=new_index_name))
+                             for i in np.arange(loop_lim)]
                     
-    # combine all of the data loaded across files together
-    out = []
-    for item in running_store:
-        out.append(pds.DataFrame.from_records(item, index=time_name))
-    out = pds.concat(out, axis=0)
-    return out, mdata        
+            # add 2D object data, all based on a unique dimension within netCDF,
+            # to loaded data dictionary
+            twod[obj_key_name] = loop_list
+            del loop_list
+
+    return mdata, twod
+
+
+def _netcdf4_string_kind(var, time_dim):
+    """Identify string variables written by pysat.
+
+    Returns
+    -------
+    string or NoneType
+        'categorical' for integer codes, 'char' for character arrays along
+        time_dim, 'table' for categorical lookup tables, and None for
+        everything else.
+
+    """
+    if 'pysat_categories' in var.ncattrs():
+        return 'categorical'
+    if var.dtype == np.dtype('S1'):
+        if var.dimensions[0] == time_dim:
+            return 'char'
+        return 'table'
+    return None
+
+
+def _netcdf4_read_strings(data, key, kind, lo, hi):
+    """Read strings from samples lo to hi of variable key into an object
+    array. Missing categorical values are returned as None."""
+    var = data.variables[key]
+    if kind == 'categorical':
+        table = data.variables[var.getncattr('pysat_categories')]
+        categories = _netcdf4_chars_to_strings(table[:])
+        codes = np.ma.getdata(var[lo:hi]).astype(np.int64)
+        # code -1 selects the None appended to the end
+        lookup = np.empty(len(categories) + 1, dtype=np.dtype('O'))
+        lookup[:-1] = categories
+        lookup[-1] = None
+        return lookup[codes]
+    values = np.empty(hi - lo, dtype=np.dtype('O'))
+    values[:] = _netcdf4_chars_to_strings(var[lo:hi])
+    return values
+
+
+def _netcdf4_chars_to_strings(chars):
+    """Convert a character array, or fixed width bytes, to unicode strings"""
+    import netCDF4
+
+    chars = np.ma.getdata(chars)
+    if chars.dtype == np.dtype('S1') and (chars.ndim > 1):
+        return netCDF4.chartostring(chars, encoding='utf-8')
+    if chars.dtype.kind == 'S':
+        # already joined by netCDF4 using the _Encoding attribute
+        return np.char.decode(chars, 'utf-8')
+    return chars
+
+
+def _netcdf4_time_to_ns(time_var, format, units=None):
+    """Convert time values written by pysat to nanoseconds since 1970.
+
+    Parameters
+    ----------
+    time_var : array_like
+        time values read from file, integer or float, possibly masked
+    format : string
+        netCDF format, used to determine units if not supplied
+    units : string or NoneType
+        units attribute of the time variable, e.g. 
+        'Microseconds since 1970-1-1 00:00:00'
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 nanoseconds, view as datetime64[ns] for times. Masked and
+        NaT values are returned as NaT.
+
+    Note
+    ----
+    Integer times are scaled in place with integer arithmetic, so no
+    precision is lost.
+
+    """
+    scales = {'nanoseconds': 1, 'microseconds': 1000, 
+              'milliseconds': 1000000, 'seconds': 1000000000}
+    scale = None
+    if units is not None:
+        scale = scales.get(units.split(' ')[0].lower(), None)
+    if scale is None:
+        scale = 1000 if format == 'NETCDF4' else 1000000
+
+    mask = np.ma.getmaskarray(time_var)
+    values = np.ma.getdata(time_var)
+    nat = np.iinfo(np.int64).min
+    if values.dtype.kind in ['i', 'u']:
+        values = values.astype(np.int64, copy=False)
+        mask = mask | (values == nat)
+        values *= scale
+    else:
+        mask = mask | np.isnan(values)
+        values = np.rint(np.where(mask, 0., values)*scale).astype(np.int64)
+    if mask.any():
+        values[mask] = nat
+    return values
+
 
 def getyrdoy(date):
     """Return a tuple of year, day of year for a supplied datetime object."""
@@ -314,7 +675,8 @@ def median1D(self, bin_params, bin_label,data_label):
     return ans
 
 
-def create_datetime_index(year=None, month=None, day=None, uts=None):
+def create_datetime_index(year=None, month=None, day=None, uts=None,
+                          ut_ns=None):
     """Create a timeseries index using supplied year, month, day, and ut in
     seconds.
 
@@ -324,7 +686,10 @@ def create_datetime_index(year=None, month=None, day=None, uts=None):
         month : array_like of ints or None
         day : array_like of ints
             for day (default) or day of year (use month=None)
-        uts : array_like of floats
+        uts : array_like of floats or ints
+            seconds of day. Floats are rounded to the nearest nanosecond.
+        ut_ns : array_like of ints
+            nanoseconds of day, used instead of uts and applied exactly
 
     Returns
     -------
@@ -337,43 +702,35 @@ def create_datetime_index(year=None, month=None, day=None, uts=None):
     """
     # need a timeseries index for storing satellite data in pandas but
     # creating a datetime object for everything is too slow
-    # so I calculate the number of nanoseconds elapsed since first sample, 
-    # and create timeseries index from that. 
-    # Factor of 20 improvement compared to previous method,
-    # which itself was an order of magnitude faster than datetime.
+    # so I calculate the number of nanoseconds elapsed since the unix epoch
+    # with integer datetime64 arithmetic, and create timeseries index from 
+    # that. No python objects are created per sample or per month.
  
-    #get list of unique year, and month
     if not hasattr(year, '__iter__'):
         raise ValueError('Must provide an iterable for all inputs.')
     if len(year) == 0:
         raise ValueError('Length of array must be larger than 0.')
-    year = year.astype(int)
+    year = np.asarray(year).astype(np.int64)
+
+    # days since epoch to the first of each month, or to the start of
+    # each year when day is day of year
     if month is None:
-        month = np.ones(len(year), dtype=int)
+        days = (year - 1970).astype('datetime64[Y]')
     else:
-        month = month.astype(int)
-        
-    if uts is None:
-        uts = np.zeros(len(year))
-    if day is None:
-        day = np.ones(len(year))
-    day = day.astype(int)
-    # track changes in seconds
-    uts_del = uts.copy().astype(float)
-    # determine where there are changes in year and month that need to be 
-    # accounted for    
-    _,idx = np.unique(year*100.+month, return_index=True)
-    # create another index array for faster algorithm below
-    idx2 = np.hstack((idx,len(year)+1))   
-    # computes UTC seconds offset for each unique set of year and month
-    for _idx,_idx2 in zip(idx[1:],idx2[2:]):
-        temp = (datetime(year[_idx],month[_idx],1) - datetime(year[0],month[0],1))
-        uts_del[_idx:_idx2] += temp.total_seconds()
-
-    # add in UTC seconds for days, ignores existence of leap seconds
-    uts_del += (day-1)*86400
-    # add in seconds since unix epoch to first day
-    uts_del += (datetime(year[0],month[0],1)-datetime(1970,1,1) ).total_seconds()
-    # going to use routine that defaults to nanseconds for epoch
-    uts_del *= 1E9
-    return pds.to_datetime(uts_del)
+        month = np.asarray(month).astype(np.int64)
+        days = ((year - 1970)*12 + month - 1).astype('datetime64[M]')
+    days = days.astype('datetime64[D]').astype(np.int64)
+    if day is not None:
+        days = days + np.asarray(day).astype(np.int64) - 1
+
+    # add in nanoseconds for days, ignores existence of leap seconds
+    nanos = days*np.int64(86400*10**9)
+    if ut_ns is not None:
+        nanos += np.asarray(ut_ns).astype(np.int64)
+    elif uts is not None:
+        uts = np.asarray(uts)
+        if uts.dtype.kind in 'iu':
+            nanos += uts.astype(np.int64)*np.int64(10**9)
+        else:
+            nanos += np.round(uts.astype(np.float64)*1E9).astype(np.int64)
+    return pds.DatetimeIndex(nanos.view('datetime64[ns]'))